@@ -4,14 +4,17 @@ from fastapi import Depends
 from services.tradings import TradingService
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.database import get_db
+from database.database import get_read_db
 
 
-def trading_service(session: Annotated[AsyncSession, Depends(get_db)]) -> TradingService:
+def trading_service(session: Annotated[AsyncSession, Depends(get_read_db)]) -> TradingService:
     """
     Функция для создания экземпляра TradingService.
 
-    :param session: Асинхронная сессия базы данных, полученная через Depends(get_db).
+    Эндпоинты торгов только читают данные, поэтому сервис получает сессию
+    с транзакциями READ ONLY.
+
+    :param session: Асинхронная сессия базы данных, полученная через Depends(get_read_db).
     :return: Экземпляр TradingService, использующий переданную сессию.
     """
     return TradingService(session)
@@ -0,0 +1,53 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.metrics import Histogram
+
+API_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+UNMATCHED_ROUTE = "unmatched"  # Метка для запросов, не попавших ни в один маршрут
+
+request_seconds = Histogram(
+    "api_request_seconds",
+    "Время обработки запроса API до отправки тела ответа (method, route - шаблон пути, status)",
+    buckets=API_LATENCY_BUCKETS,
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware, замеряющее время обработки запросов по маршрутам.
+
+    Метка `route` - шаблон пути маршрута (`/trading/dynamics`), а не фактический
+    путь, чтобы число временных рядов не зависело от параметров. Время считается
+    до отправки последнего фрагмента тела, поэтому включает потоковые выгрузки.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Маршрутизатор дописывает найденный маршрут в тот же scope
+            route = scope.get("route")
+            request_seconds.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", UNMATCHED_ROUTE),
+                status=status,
+            )
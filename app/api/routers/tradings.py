@@ -1,33 +1,82 @@
-from typing import Annotated
+from typing import Annotated, Any, AsyncIterator
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Response
+from fastapi.responses import StreamingResponse
+from services.tradings import TRADING_COLUMNS, TradingService
 
 from api.dependencies import TradingServiceDepends
-from schemas.params import DynamicParams, LastParams, LimitOffset
-from schemas.tradings import Trading, TradingLastDays
+from database.database import read_session
+from schemas.params import (
+    AggregateParams,
+    DynamicParams,
+    ExportParams,
+    LastParams,
+    LimitOffset,
+)
+from schemas.tradings import Trading, TradingAggregate, TradingLastDays
+from utils.export import csv_header, encode_rows, MEDIA_TYPES
 
 router = APIRouter()
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 
 @router.get("/last_trading_dates", summary="Список дат последних торговых дней")
 async def get_last_trading_dates(
     trading_service: TradingServiceDepends, params: Annotated[LimitOffset, Query()]
 ) -> TradingLastDays:
-    results = await trading_service.get_last_dates(**params.model_dump())
-    return TradingLastDays(dates=results)
+    return await trading_service.get_last_dates(**params.model_dump())
 
 
 @router.get("/dynamics", summary="Список торгов за заданный период")
 async def get_dynamics(
-    trading_service: TradingServiceDepends, params: Annotated[DynamicParams, Query()]
+    trading_service: TradingServiceDepends, params: Annotated[DynamicParams, Query()], response: Response
 ) -> list[Trading]:
-    results = await trading_service.filter(**params.model_dump(exclude_unset=True))
-    return results
+    page = await trading_service.filter(**params.model_dump(exclude_unset=True))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
+
+
+@router.get("/dynamics/aggregates", summary="Объем, стоимость и VWAP торгов по периодам")
+async def get_dynamics_aggregates(
+    trading_service: TradingServiceDepends, params: Annotated[AggregateParams, Query()], response: Response
+) -> list[TradingAggregate]:
+    page = await trading_service.aggregate(**params.model_dump(exclude_unset=True))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
+
+
+async def _export_chunks(export_format: str, filters: dict[str, Any]) -> AsyncIterator[bytes]:
+    """
+    Формирует тело выгрузки по мере чтения строк из БД.
+
+    Сессия открывается внутри генератора: сессия из зависимости `get_read_db`
+    закрывается раньше, чем StreamingResponse начинает отдавать тело.
+    """
+    if export_format == "csv":
+        yield csv_header(TRADING_COLUMNS)
+    async with read_session() as session:
+        async for rows in TradingService(session).stream_export(**filters):
+            yield encode_rows(rows, TRADING_COLUMNS, export_format)
+
+
+@router.get("/dynamics/export", summary="Потоковая выгрузка торгов за период в NDJSON или CSV")
+async def export_dynamics(params: Annotated[ExportParams, Query()]) -> StreamingResponse:
+    filters = params.model_dump(exclude={"format"}, exclude_unset=True)
+    return StreamingResponse(
+        _export_chunks(params.format, filters),
+        media_type=MEDIA_TYPES[params.format],
+        headers={"Content-Disposition": f'attachment; filename="trading_results.{params.format}"'},
+    )
 
 
 @router.get("/trading_results", summary="Список последних торгов")
 async def get_trading_results(
-    trading_service: TradingServiceDepends, params: Annotated[LastParams, Query()]
+    trading_service: TradingServiceDepends, params: Annotated[LastParams, Query()], response: Response
 ) -> list[Trading]:
-    results = await trading_service.filter(**params.model_dump(exclude_unset=True))
-    return results
+    page = await trading_service.filter(**params.model_dump(exclude_unset=True))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
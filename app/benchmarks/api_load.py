@@ -0,0 +1,195 @@
+"""
+Нагрузочный тест эндпоинтов /trading: задержка p50/p95/p99 и запросов в секунду
+при разной конкурентности, с кэшем и без.
+
+Приложение вызывается в процессе через httpx.ASGITransport (без uvicorn и
+сети), клиент и приложение делят один цикл событий. Нужен большой набор
+данных, его генерирует load_data.py. Запуск из каталога app:
+
+    python load_data.py --synthetic 3000000
+    python -m benchmarks.api_load --concurrency 1 16 64 --requests 2000
+
+Для каждого эндпоинта заранее строится `--distinct` наборов параметров по
+синтетическим oil_id/базисам и датам набора; запросы выбирают их случайно.
+Перед замером каждый набор запрашивается один раз (прогрев буферов БД, а с
+кэшем - заполнение кэша), поэтому `cache on` показывает установившийся режим
+попаданий. С `--backend redis` вторым уровнем кэша служит Redis из настроек,
+с `--backend memory` - InMemoryBackend. Базовые результаты - в api_load_baseline.md.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from typing import Any
+
+import httpx
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.backends.redis import RedisBackend
+from fastapi_cache.types import Backend
+from load_data import SYNTHETIC_BASES, SYNTHETIC_OILS
+from main import app
+from sqlalchemy import func, select
+
+from configs.config import settings
+from database.database import AsyncSessionLocal
+from database.models import TradingDay
+from utils.cache import l1_cache
+from utils.redis_client import get_redis
+
+CACHE_NAMESPACES = ("trading:last_dates", "trading:filter", "trading:aggregate")  # Пространства имен кэша сервиса
+PERIOD_DAYS = 30  # Длина периода в запросах /dynamics, дней
+RECENT_DAYS = 365  # Периоды /dynamics выбираются из последних торговых дней набора
+PAGE_LIMIT = 100  # Строк на странице в запросах торгов
+MIN_REQUESTS = 100  # Меньше запросов на уровень - p99 совпадает с максимумом и ничего не говорит
+
+
+def oil_id(rng: random.Random) -> str:
+    return f"S{rng.randrange(SYNTHETIC_OILS):03d}"
+
+
+def basis_id(rng: random.Random) -> str:
+    return f"S{rng.randrange(SYNTHETIC_BASES):02d}"
+
+
+def endpoints(last_day: date) -> dict[str, tuple[str, Any]]:
+    """Эндпоинты и генераторы параметров запроса"""
+
+    def last_trading_dates(rng: random.Random) -> dict:
+        return {"limit": rng.choice((10, 30, 100)), "offset": rng.randrange(0, 100, 10)}
+
+    def dynamics(rng: random.Random) -> dict:
+        end = last_day - timedelta(days=rng.randrange(RECENT_DAYS))
+        return {
+            "oil_id": oil_id(rng),
+            "start_date": (end - timedelta(days=PERIOD_DAYS)).isoformat(),
+            "end_date": end.isoformat(),
+            "limit": PAGE_LIMIT,
+        }
+
+    def trading_results(rng: random.Random) -> dict:
+        params = {"oil_id": oil_id(rng), "limit": PAGE_LIMIT}
+        if rng.random() < 0.5:
+            params["delivery_basis_id"] = basis_id(rng)
+        return params
+
+    return {
+        "last_trading_dates": ("/trading/last_trading_dates", last_trading_dates),
+        "dynamics": ("/trading/dynamics", dynamics),
+        "trading_results": ("/trading/trading_results", trading_results),
+    }
+
+
+async def setup_cache(backend: Backend, enabled: bool) -> None:
+    """Включает или выключает кэш API и очищает оба уровня, чтобы замеры не зависели от прошлых прогонов"""
+    FastAPICache.reset()  # init() повторно не применяется
+    FastAPICache.init(backend, prefix=settings.CACHE_PREFIX, enable=enabled)
+    for namespace in CACHE_NAMESPACES:
+        await FastAPICache.clear(namespace)
+    l1_cache.clear()
+
+
+def summarize(latencies: list[float], errors: int, wall: float) -> dict:
+    """Перцентили задержки в мс и пропускная способность"""
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:  # quantiles() нужно не меньше двух значений
+        p50 = p95 = p99 = max(latencies, default=0.0)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / wall, 1) if wall > 0 else 0.0,
+        "p50_ms": round(p50 * 1000, 2),
+        "p95_ms": round(p95 * 1000, 2),
+        "p99_ms": round(p99 * 1000, 2),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 2),
+    }
+
+
+async def drive(client: httpx.AsyncClient, path: str, params: list[dict], concurrency: int) -> dict:
+    """Выполняет запросы `concurrency` воркерами и возвращает сводку"""
+    pending = iter(params)
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+        for query in pending:
+            start = time.perf_counter()
+            response = await client.get(path, params=query)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def main(args: argparse.Namespace) -> dict:
+    async with AsyncSessionLocal() as session:
+        last_day = await session.scalar(select(func.max(TradingDay.date)))
+        total_rows = await session.scalar(select(func.sum(TradingDay.row_count)))
+    if last_day is None:
+        raise SystemExit("В БД нет торгов, сначала выполните `python load_data.py --synthetic ROWS`")
+
+    rng = random.Random(args.seed)
+    targets = {
+        name: (path, [make_params(rng) for _ in range(args.distinct)])
+        for name, (path, make_params) in endpoints(last_day).items()
+        if not args.endpoints or name in args.endpoints
+    }
+    report = {"rows": total_rows, "backend": args.backend, "distinct": args.distinct, "results": []}
+    redis_client = await get_redis() if args.backend == "redis" else None
+    backend = RedisBackend(redis_client) if redis_client is not None else InMemoryBackend()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+        for cache in args.cache:
+            await setup_cache(backend, cache == "on")
+            for name, (path, distinct) in targets.items():
+                await drive(client, path, distinct, args.concurrency[-1])
+                for concurrency in args.concurrency:
+                    params = [rng.choice(distinct) for _ in range(args.requests)]
+                    summary = await drive(client, path, params, concurrency)
+                    report["results"].append({"endpoint": name, "cache": cache, "concurrency": concurrency, **summary})
+                    print(
+                        f"{name:<20} cache {cache:<3} c={concurrency:<4} {summary['rps']:>8.1f} rps "
+                        f"p50 {summary['p50_ms']:>7.2f} p95 {summary['p95_ms']:>7.2f} p99 {summary['p99_ms']:>7.2f} мс"
+                        f"{'  ошибок ' + str(summary['errors']) if summary['errors'] else ''}"
+                    )
+    if redis_client is not None:
+        await redis_client.close()
+    return report
+
+
+def parse_args() -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64], help="уровни конкурентности")
+    arg_parser.add_argument("--requests", type=int, default=1000, help="запросов на эндпоинт и уровень")
+    arg_parser.add_argument("--distinct", type=int, default=200, help="разных наборов параметров на эндпоинт")
+    arg_parser.add_argument("--cache", nargs="+", choices=("off", "on"), default=["off", "on"], help="режимы кэша")
+    arg_parser.add_argument("--backend", choices=("redis", "memory"), default="redis", help="второй уровень кэша")
+    arg_parser.add_argument("--endpoints", nargs="+", help="только эти эндпоинты (по умолчанию все)")
+    arg_parser.add_argument("--seed", type=int, default=42, help="зерно генератора параметров")
+    arg_parser.add_argument("--output", type=str, help="файл для JSON-отчета")
+    args = arg_parser.parse_args()
+    if args.requests < MIN_REQUESTS:
+        arg_parser.error(f"--requests: для перцентилей нужно не меньше {MIN_REQUESTS} запросов")
+    if args.distinct < 1 or min(args.concurrency) < 1:
+        arg_parser.error("--distinct и --concurrency должны быть положительными")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.disable(logging.WARNING)
+    report = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
@@ -0,0 +1,171 @@
+"""
+Проверка планов запросов `TradingService.filter` на сгенерированных данных.
+
+Создает во временной схеме копию `spimex_trading_results` с индексами рабочей таблицы,
+заполняет ее синтетическими торгами, выполняет EXPLAIN (ANALYZE, FORMAT JSON)
+для типичных фильтров и проверяет, что используется ожидаемый индекс без
+последовательного сканирования таблицы. Все изменения откатываются.
+Запуск из каталога app:
+
+    python -m benchmarks.explain_indexes --rows 3000000
+
+Код возврата 1, если хотя бы один план не соответствует ожиданиям. Та же
+проверка выполняется тестом tests/test_query_plans.py, если задана переменная
+окружения EXPLAIN_TEST_ROWS (без нее тест пропускается: нужен PostgreSQL с
+примененными миграциями).
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from datetime import date, timedelta
+
+from services.tradings import TradingService
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from database.database import engine
+from utils.pagination import encode_cursor
+
+SCHEMA = "spimex_explain"
+DAYS = 800
+FIRST_DAY = date(2023, 1, 1)
+
+
+SEED_SQL = f"""
+INSERT INTO {SCHEMA}.spimex_trading_results (
+    id, exchange_product_id, exchange_product_name, oil_id, delivery_basis_id, delivery_basis_name,
+    delivery_type_id, volume, total, count, date, created_on, updated_on
+)
+SELECT
+    g + 1,
+    oil || basis || '060' || kind,
+    'Продукт ' || oil || ', ' || basis,
+    oil,
+    basis,
+    'Базис ' || basis,
+    kind,
+    (g % 1000) + 1,
+    ((g % 100000) + 1) * 1000.50,
+    (g % 7) + 1,
+    DATE '{FIRST_DAY.isoformat()}' + (g % {DAYS}),
+    now(),
+    now()
+FROM (
+    SELECT
+        g,
+        'A' || lpad(((g / {DAYS}) % 300)::text, 3, '0') AS oil,
+        'B' || lpad(((g / {DAYS} / 300) % 100)::text, 2, '0') AS basis,
+        chr(65 + (g / {DAYS} / 30000) % 5) AS kind
+    FROM generate_series(0, :rows - 1) AS g
+) AS src
+"""
+
+
+def cases() -> list[tuple[str, dict, str]]:
+    """Типичные фильтры /dynamics и /trading_results и ожидаемый индекс"""
+    end = FIRST_DAY + timedelta(days=DAYS - 1)
+    return [
+        (
+            "продукт + период",
+            {"oil_id": "A001", "delivery_basis_id": "B00", "delivery_type_id": "A",
+             "start_date": end - timedelta(days=365), "end_date": end, "limit": 100},
+            "ix_spimex_trading_results_product_date",
+        ),
+        (
+            "нефтепродукт + период",
+            {"oil_id": "A001", "start_date": end - timedelta(days=30), "end_date": end, "limit": 100},
+            "ix_spimex_trading_results_product_date",
+        ),
+        (
+            "базис + период",
+            {"delivery_basis_id": "B03", "start_date": end - timedelta(days=30), "end_date": end, "limit": 100},
+            "ix_spimex_trading_results_basis_date",
+        ),
+        (
+            "последние торги",
+            {"limit": 100},
+            "ix_spimex_trading_results_date_id",
+        ),
+        (
+            "последние торги по курсору",
+            {"limit": 100, "cursor": encode_cursor(end - timedelta(days=200), 10**9)},
+            "ix_spimex_trading_results_date_id",
+        ),
+    ]
+
+
+def plan_nodes(plan: dict) -> list[dict]:
+    """Плоский список узлов плана"""
+    nodes = [plan]
+    for child in plan.get("Plans", []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+
+async def check_plans(rows: int) -> list[tuple[str, bool, str]]:
+    """
+    Строит временную копию таблицы и проверяет планы типичных фильтров.
+
+    :param rows: Количество сгенерированных строк.
+    :return: Для каждого случая: название, соответствует ли план ожиданиям, описание плана.
+    """
+    service = TradingService(None)
+    results = []
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            # Без значений по умолчанию, чтобы не сдвигать последовательность id рабочей таблицы
+            await conn.execute(text(f"CREATE TABLE {SCHEMA}.spimex_trading_results (LIKE public.spimex_trading_results)"))
+            print(f"Генерация {rows} строк...")
+            await conn.execute(text(SEED_SQL), {"rows": rows})
+            # Индексы создаются с теми же именами, что и в рабочей схеме
+            indexes = await conn.scalars(
+                text("SELECT indexdef FROM pg_indexes WHERE schemaname = 'public' AND tablename = 'spimex_trading_results'")
+            )
+            for indexdef in indexes.all():
+                await conn.execute(text(indexdef.replace(" ON public.", f" ON {SCHEMA}.")))
+            await conn.execute(text(f"ANALYZE {SCHEMA}.spimex_trading_results"))
+            await conn.execute(text(f"SET LOCAL search_path TO {SCHEMA}, public"))
+
+            for name, filters, expected_index in cases():
+                query = service.filter_query(**filters).compile(
+                    dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+                )
+                result = await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}"))
+                explain = result.scalar()
+                explain = json.loads(explain) if isinstance(explain, str) else explain
+                nodes = plan_nodes(explain[0]["Plan"])
+                indexes = {node.get("Index Name") for node in nodes if "Index Name" in node}
+                seq_scans = [node for node in nodes if node["Node Type"] == "Seq Scan"]
+                node_types = ", ".join(node["Node Type"] for node in nodes)
+                results.append(
+                    (
+                        name,
+                        expected_index in indexes and not seq_scans,
+                        f"{explain[0]['Execution Time']:.2f} мс, узлы: {node_types}, "
+                        f"индексы: {', '.join(sorted(indexes)) or '-'}",
+                    )
+                )
+        finally:
+            await transaction.rollback()
+    return results
+
+
+async def main(rows: int) -> int:
+    try:
+        results = await check_plans(rows)
+    finally:
+        await engine.dispose()
+    for name, ok, description in results:
+        print(f"[{'OK' if ok else 'FAIL'}] {name}: {description}")
+    return 0 if all(ok for _, ok, _ in results) else 1
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=3_000_000, help="количество сгенерированных строк")
+    args = arg_parser.parse_args()
+    sys.exit(asyncio.run(main(args.rows)))
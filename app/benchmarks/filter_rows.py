@@ -0,0 +1,87 @@
+"""
+Сравнение скорости чтения страницы торгов от запроса до готового JSON (строк в секунду).
+
+`orm` - исходный путь: select(модель), ORM-объекты и валидация `Trading`
+через from_attributes; `core` - текущий `TradingService.filter`: только
+колонки API и `Trading.model_construct`. Сериализация в обоих случаях
+такая же, как у ответа FastAPI со схемой list[Trading]. Запуск из каталога app:
+
+    python -m benchmarks.filter_rows --rows 10000 --repeat 20
+
+Синтетические строки пишутся в `spimex_trading_results` с датами
+до 1900 года и удаляются после замера.
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import date, timedelta
+
+from benchmarks.loaders import BENCH_START_DATE, cleanup, make_file
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from pydantic import TypeAdapter
+from services.tradings import TradingService
+from sqlalchemy import select
+
+from database.crud import copy_create_trade
+from database.database import AsyncSessionLocal, engine
+from schemas.tradings import Trading, TradingPage
+
+TRADINGS_ADAPTER = TypeAdapter(list[Trading])
+BENCH_END_DATE = date(1899, 12, 31)
+FILE_ROWS = 2000
+
+
+async def orm_page(session, limit: int) -> TradingPage:
+    """Исходный способ: ORM-объекты и model_validate(from_attributes=True)"""
+    model = TradingService(session).model
+    stmt = (
+        select(model)
+        .where(model.date <= BENCH_END_DATE)
+        .order_by(model.date.desc(), model.id.desc())
+        .limit(limit + 1)
+    )
+    results = (await session.scalars(stmt)).all()
+    return TradingPage.model_validate({"items": results[:limit]}, from_attributes=True)
+
+
+async def core_page(session, limit: int) -> TradingPage:
+    """Текущий способ: TradingService.filter без кэша"""
+    return await TradingService.filter.__wrapped__(TradingService(session), end_date=BENCH_END_DATE, limit=limit)
+
+
+async def run(read_page, name: str, limit: int, repeat: int) -> float:
+    """Читает страницу `repeat` раз и возвращает строк в секунду"""
+    elapsed = 0.0
+    for _ in range(repeat):
+        async with AsyncSessionLocal() as session:
+            start = time.perf_counter()
+            page = await read_page(session, limit)
+            body = TRADINGS_ADAPTER.dump_json(page.items)
+            elapsed += time.perf_counter() - start
+    rows_per_sec = len(page.items) * repeat / elapsed
+    print(f"{name:<6} {elapsed / repeat * 1000:8.1f} мс/стр. {rows_per_sec:12.0f} строк/с {len(body)} байт")
+    return rows_per_sec
+
+
+async def main(rows: int, repeat: int) -> None:
+    FastAPICache.init(InMemoryBackend())
+    await cleanup()
+    try:
+        for day in range(rows // FILE_ROWS + 1):
+            await copy_create_trade(make_file(BENCH_START_DATE + timedelta(days=day), FILE_ROWS))
+        for name, read_page in (("orm", orm_page), ("core", core_page)):
+            await run(read_page, name, rows, 1)  # прогрев
+            await run(read_page, name, rows, repeat)
+    finally:
+        await cleanup()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=10_000, help="строк в одной странице ответа")
+    arg_parser.add_argument("--repeat", type=int, default=20, help="количество повторов замера")
+    args = arg_parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -0,0 +1,268 @@
+"""
+Сквозной бенчмарк загрузки: страницы -> ссылки -> файлы -> разбор -> БД.
+
+Запускает `parser_main.main()` против локального aiohttp-сервера, который
+отдает сохраненные страницы результатов и xls-бюллетени SPIMEX, и печатает
+JSON с пропускной способностью по этапам (страниц/с, файлов/с, строк/с),
+пиковым RSS и процессорным временем. Запуск из каталога app:
+
+    # один раз сохранить 3 страницы и их бюллетени с spimex.com
+    python -m benchmarks.ingestion record --pages 3
+
+    # прогон по сохраненным данным
+    python -m benchmarks.ingestion run --output ingestion.json
+
+    # прогон без сети: страницы генерируются, каждый бюллетень - копия шаблона
+    python -m benchmarks.ingestion run --synthetic oil_xls.xls --pages 20
+
+Сохраненные бюллетени содержат реальные даты и записываются в настроенную БД
+так же, как при обычной загрузке. Синтетические данные пишутся с датами до
+1900 года и удаляются после замера.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import resource
+import socket
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import aiohttp
+import parser_main
+from aiohttp import web
+from benchmarks.loaders import cleanup
+from benchmarks.page_parser import ITEM_TEMPLATE
+from yarl import URL
+
+from parsers.http_policy import HttpPolicy
+from parsers.parser import Parser
+from parsers.scraper import fetch_file, fetch_page
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"  # Сохраненные страницы (pages/) и бюллетени (files/)
+SYNTHETIC_LAST_DAY = date(1899, 12, 31)  # Синтетические торги идут назад от этой даты
+SYNTHETIC_ITEMS = 10  # Бюллетеней на синтетической странице, как на сайте
+SERVER_HOST = "127.0.0.1"
+
+
+def synthetic_page(page: int, items: int) -> str:
+    """Страница результатов с `items` бюллетенями за даты до 1900 года"""
+    first = (page - 1) * items
+    body = "".join(
+        ITEM_TEMPLATE.format(day=f"{day:%d.%m.%Y}", stamp=f"{day:%Y%m%d}")
+        for day in (SYNTHETIC_LAST_DAY - timedelta(days=first + i) for i in range(items))
+    )
+    return f"<html><body><div class='accordeon-inner'>{body}</div></body></html>"
+
+
+def make_app(fixtures: Path, template: bytes | None, pages: int, items: int) -> web.Application:
+    """
+    Приложение, отвечающее как сайт биржи.
+
+    Страница `?page=page-N` берется из `fixtures/pages/page-N.html`, файл по
+    пути `/upload/...` - из `fixtures/files/upload/...`. Если передан шаблон
+    xls, страницы генерируются, а на любой файл отдается шаблон.
+    """
+
+    async def page_handler(request: web.Request) -> web.Response:
+        page = int(request.query.get("page", "page-1").removeprefix("page-"))
+        if template is not None:
+            if page > pages:
+                raise web.HTTPNotFound()
+            return web.Response(text=synthetic_page(page, items), content_type="text/html")
+        path = fixtures / "pages" / f"page-{page}.html"
+        if not path.exists():
+            raise web.HTTPNotFound()
+        return web.Response(body=path.read_bytes(), content_type="text/html", charset="utf-8")
+
+    async def file_handler(request: web.Request) -> web.StreamResponse:
+        if template is not None:
+            return web.Response(body=template, content_type="application/vnd.ms-excel")
+        path = fixtures / "files" / request.path.lstrip("/")
+        if not path.is_file():
+            raise web.HTTPNotFound()
+        return web.FileResponse(path)
+
+    app = web.Application()
+    app.router.add_get(parser_main.PAGE_PATH, page_handler)
+    app.router.add_get("/upload/{tail:.*}", file_handler)
+    return app
+
+
+def serve(port: int, fixtures: Path, template: bytes | None, pages: int, items: int) -> None:
+    """Точка входа процесса сервера"""
+    web.run_app(make_app(fixtures, template, pages, items), host=SERVER_HOST, port=port, print=None)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind((SERVER_HOST, 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_server(base_url: str, timeout: float = 10.0) -> None:
+    """Ждет, пока сервер начнет принимать соединения"""
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.get(base_url + parser_main.PAGE_PATH, params={"page": "page-1"}):
+                    return
+            except aiohttp.ClientConnectionError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.05)
+
+
+async def record(fixtures: Path, pages: int) -> None:
+    """Сохраняет страницы результатов и их бюллетени с сайта биржи"""
+    policy = HttpPolicy()
+    (fixtures / "pages").mkdir(parents=True, exist_ok=True)
+    async with aiohttp.ClientSession() as session:
+        for page in range(1, pages + 1):
+            html = await fetch_page(session, parser_main.PAGE_URL, params={"page": f"page-{page}"}, policy=policy)
+            if html is None:
+                sys.exit(f"Не удалось загрузить страницу {page}")
+            (fixtures / "pages" / f"page-{page}.html").write_text(html, encoding="utf-8")
+            links = Parser(html, parser_main.MIN_YEAR, parser_main.CURRENT_YEAR).extract_file_links()
+            for link, _ in links:
+                file = await fetch_file(session, parser_main.BASE_URL + link, policy=policy)
+                if file is None:
+                    sys.exit(f"Не удалось скачать {link}")
+                path = fixtures / "files" / URL(link).path.lstrip("/")
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with file:
+                    path.write_bytes(file.read())
+            print(f"Страница {page}: сохранено {len(links)} бюллетеней")
+
+
+def usage() -> dict[str, float]:
+    """Процессорное время и пиковый RSS процесса и завершенных дочерних процессов"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        "cpu_user": own.ru_utime,
+        "cpu_system": own.ru_stime,
+        "children_cpu_user": children.ru_utime,
+        "children_cpu_system": children.ru_stime,
+        "peak_rss_mb": own.ru_maxrss / 1024,  # ru_maxrss в Linux - КБ
+        "children_peak_rss_mb": children.ru_maxrss / 1024,
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """Прогоняет конвейер против локального сервера и возвращает отчет"""
+    template = args.synthetic.read_bytes() if args.synthetic else None
+    if template is not None:
+        pages, min_year, current_year = args.pages, SYNTHETIC_LAST_DAY.year - 99, SYNTHETIC_LAST_DAY.year
+    else:
+        pages = len(list((args.fixtures / "pages").glob("page-*.html")))
+        if not pages:
+            sys.exit(f"В {args.fixtures} нет сохраненных страниц, сначала выполните `record`")
+        min_year, current_year = parser_main.MIN_YEAR, parser_main.CURRENT_YEAR
+
+    port = free_port()
+    base_url = f"http://{SERVER_HOST}:{port}"
+    server = multiprocessing.Process(
+        target=serve, args=(port, args.fixtures, template, pages, args.items), daemon=True
+    )
+    server.start()
+    try:
+        await wait_for_server(base_url)
+        if template is not None:
+            await cleanup()
+        before = usage()
+        start = time.perf_counter()
+        pipeline = await parser_main.main(
+            loader=parser_main.LOADERS[args.loader],
+            parse_workers=args.parse_workers,
+            download_workers=args.download_workers,
+            db_workers=args.db_workers,
+            http_policy=HttpPolicy(rate=None),
+            base_url=base_url,
+            last_page=pages,
+            min_year=min_year,
+            current_year=current_year,
+            notify=False,
+        )
+        wall = time.perf_counter() - start
+        # Снимок до остановки сервера: его процесс не должен попасть в RUSAGE_CHILDREN
+        after = usage()
+    finally:
+        server.terminate()
+        server.join()
+        if template is not None:
+            await cleanup()
+
+    stage_units = {"pages": "pages", "html": "pages", "links": "files", "files": "files", "records": "files"}
+    return {
+        "mode": "synthetic" if template is not None else "recorded",
+        "loader": args.loader,
+        "parse_workers": args.parse_workers,
+        "wall_seconds": round(wall, 3),
+        "stages": {
+            name: {
+                "items": pipeline.processed[name],
+                "unit": unit,
+                "per_second": round(pipeline.processed[name] / wall, 2),
+                "busy_seconds": round(pipeline.stage_seconds[name], 3),
+            }
+            for name, unit in stage_units.items()
+        },
+        "rows": pipeline.rows_written,
+        "rows_per_second": round(pipeline.rows_written / wall, 1),
+        "cpu_seconds": {
+            "process": round(after["cpu_user"] + after["cpu_system"] - before["cpu_user"] - before["cpu_system"], 3),
+            "parse_workers": round(
+                after["children_cpu_user"]
+                + after["children_cpu_system"]
+                - before["children_cpu_user"]
+                - before["children_cpu_system"],
+                3,
+            ),
+        },
+        "peak_rss_mb": {
+            "process": round(after["peak_rss_mb"], 1),
+            "parse_workers": round(after["children_peak_rss_mb"], 1),
+        },
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--fixtures", type=Path, default=FIXTURES_DIR, help="каталог сохраненных данных")
+    arg_parser.add_argument("--verbose", action="store_true", help="не отключать логи загрузки")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="сохранить страницы и бюллетени с сайта биржи")
+    record_parser.add_argument("--pages", type=int, default=3, help="сколько страниц сохранить")
+
+    run_parser = commands.add_parser("run", help="прогнать загрузку против локального сервера")
+    run_parser.add_argument("--synthetic", type=Path, help="xls-шаблон для синтетического прогона без сохраненных данных")
+    run_parser.add_argument("--pages", type=int, default=10, help="страниц в синтетическом прогоне")
+    run_parser.add_argument("--items", type=int, default=SYNTHETIC_ITEMS, help="бюллетеней на синтетической странице")
+    run_parser.add_argument("--loader", choices=parser_main.LOADERS, default="upsert", help="способ записи в БД")
+    run_parser.add_argument("--parse-workers", type=int, default=parser_main.PARSE_WORKERS, help="процессов разбора")
+    run_parser.add_argument(
+        "--download-workers", type=int, default=parser_main.MAX_CONCURRENT_REQUESTS, help="воркеры скачивания"
+    )
+    run_parser.add_argument("--db-workers", type=int, default=parser_main.MAX_DB_CONCURRENT, help="воркеры записи в БД")
+    run_parser.add_argument("--output", type=Path, help="файл для JSON-отчета (по умолчанию stdout)")
+    return arg_parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+    if args.command == "record":
+        asyncio.run(record(args.fixtures, args.pages))
+    else:
+        report = json.dumps(asyncio.run(run(args)), ensure_ascii=False, indent=2)
+        if args.output:
+            args.output.write_text(report + "\n", encoding="utf-8")
+        print(report)
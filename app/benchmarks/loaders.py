@@ -0,0 +1,94 @@
+"""
+Сравнение скорости способов записи торгов в БД (строк в секунду).
+
+Запуск из каталога app:
+
+    python -m benchmarks.loaders --files 20 --rows 2000
+
+Синтетические строки пишутся в `spimex_trading_results` с датами
+до 1900 года и удаляются после замера.
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import delete, insert
+
+from database.crud import copy_create_trade, mass_create_trade
+from database.database import async_context_session, engine
+from database.models import SpimexTradingResults, TradingDay
+
+BENCH_START_DATE = date(1800, 1, 1)
+
+
+@async_context_session
+async def executemany_create_trade(session, lst_data: list[dict]) -> None:
+    """Исходный способ записи: insert() + executemany без обработки конфликтов"""
+    await session.execute(insert(SpimexTradingResults), lst_data)
+
+
+@async_context_session
+async def cleanup(session) -> None:
+    """Удаляет синтетические строки бенчмарка"""
+    await session.execute(delete(SpimexTradingResults).where(SpimexTradingResults.date < date(1900, 1, 1)))
+    await session.execute(delete(TradingDay).where(TradingDay.date < date(1900, 1, 1)))
+
+
+def make_file(bidding_date: date, rows: int) -> list[dict]:
+    """Генерирует данные одного синтетического бюллетеня"""
+    now = datetime.now()
+    return [
+        {
+            "exchange_product_id": f"B{i:05d}BNC{i % 10}F",
+            "exchange_product_name": f"Бензин (АИ-{i % 100}), ст. Бенчмарк",
+            "oil_id": f"B{i % 1000:03d}",
+            "delivery_basis_id": "BNC",
+            "delivery_basis_name": "ст. Бенчмарк",
+            "delivery_type_id": "F",
+            "volume": 60 + i,
+            "total": Decimal("5997120.00") + i,
+            "count": 1 + i % 7,
+            "date": bidding_date,
+            "created_on": now,
+            "updated_on": now,
+        }
+        for i in range(rows)
+    ]
+
+
+async def run(loader, name: str, first_date: date, files: int, rows: int) -> float:
+    """Загружает `files` бюллетеней по `rows` строк и возвращает строк в секунду"""
+    data = [make_file(first_date + timedelta(days=i), rows) for i in range(files)]
+    start = time.perf_counter()
+    for lst_data in data:
+        await loader(lst_data)
+    elapsed = time.perf_counter() - start
+    rows_per_sec = files * rows / elapsed
+    print(f"{name:<12} {elapsed:8.2f} с {rows_per_sec:12.0f} строк/с")
+    return rows_per_sec
+
+
+async def main(files: int, rows: int) -> None:
+    loaders = (
+        ("executemany", executemany_create_trade),
+        ("upsert", mass_create_trade),
+        ("copy", copy_create_trade),
+    )
+    await cleanup()
+    try:
+        for i, (name, loader) in enumerate(loaders):
+            await run(loader, name, BENCH_START_DATE + timedelta(days=i * files), files, rows)
+    finally:
+        await cleanup()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--files", type=int, default=20, help="количество синтетических бюллетеней")
+    arg_parser.add_argument("--rows", type=int, default=2000, help="строк в одном бюллетене")
+    args = arg_parser.parse_args()
+    asyncio.run(main(args.files, args.rows))
@@ -0,0 +1,72 @@
+"""
+Бенчмарк разбора страницы со списком бюллетеней.
+
+Сравнивает бэкенды `Parser` (lxml и BeautifulSoup/html.parser) на сохраненных
+страницах результатов торгов. Запуск из каталога app:
+
+    python -m benchmarks.page_parser pages/page-1.html pages/page-2.html --repeat 50
+
+Без аргументов используется синтетическая страница с той же разметкой.
+"""
+
+import argparse
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from parsers.parser import Parser
+
+ITEM_TEMPLATE = """
+<div class="accordeon-inner__item">
+  <div class="accordeon-inner__item-inner">
+    <div class="accordeon-inner__item-inner__title">
+      <span>Бюллетень по итогам торгов в Секции «Нефтепродукты» за {day}</span>
+    </div>
+    <a class="link xls" href="/upload/reports/oil_xls/oil_xls_{stamp}162000.xls?r=1">XLS</a>
+    <a class="link pdf" href="/upload/reports/oil_pdf/oil_pdf_{stamp}162000.pdf?r=1">PDF</a>
+  </div>
+</div>
+"""
+
+
+def synthetic_page(items: int = 10) -> str:
+    """Генерирует страницу с разметкой, повторяющей страницу результатов SPIMEX"""
+    start = date.today()
+    body = "".join(
+        ITEM_TEMPLATE.format(day=(start - timedelta(days=i)).strftime("%d.%m.%Y"), stamp=f"{start - timedelta(days=i):%Y%m%d}")
+        for i in range(items)
+    )
+    filler = "<div class='news-item'><p>" + "Lorem ipsum dolor sit amet. " * 50 + "</p></div>"
+    return f"<html><head><title>SPIMEX</title></head><body>{filler * 40}<div class='accordeon-inner'>{body}</div></body></html>"
+
+
+def bench(name: str, content: str, repeat: int) -> None:
+    """Печатает лучшее время разбора страницы каждым бэкендом"""
+    year = date.today().year
+    results = {}
+    for backend in Parser.backends:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            links = Parser(content, year - 5, year, backend=backend).extract_file_links()
+            best = min(best, time.perf_counter() - start)
+        results[backend] = (best, links)
+    lxml_time, lxml_links = results["lxml"]
+    soup_time, soup_links = results["html.parser"]
+    assert lxml_links == soup_links, "Бэкенды вернули разные ссылки"
+    print(
+        f"{name}: {len(lxml_links)} ссылок, html.parser {soup_time * 1000:.2f} мс, "
+        f"lxml {lxml_time * 1000:.2f} мс, ускорение x{soup_time / lxml_time:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("pages", nargs="*", type=Path, help="сохраненные html-страницы результатов торгов")
+    arg_parser.add_argument("--repeat", type=int, default=50, help="количество повторов")
+    args = arg_parser.parse_args()
+    if args.pages:
+        for path in args.pages:
+            bench(path.name, path.read_text(encoding="utf-8"), args.repeat)
+    else:
+        bench("synthetic", synthetic_page(), args.repeat)
@@ -0,0 +1,107 @@
+"""
+Микро-бенчмарк разбора бюллетеня.
+
+Сравнивает исходные этапы `XLSExtractor` (чтение всего листа через pandas,
+поиск секции через stack(), построчное преобразование iterrows + Decimal)
+с текущими на реальных бюллетенях SPIMEX. Запуск из каталога app:
+
+    python -m benchmarks.xls_extractor path/to/oil_xls_20250326.xls --repeat 20
+"""
+
+import argparse
+import io
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+
+import pandas as pd
+
+from utils.file_utils import XLSExtractor
+
+
+def legacy_extract_table(content: bytes) -> pd.DataFrame:
+    """Исходное чтение листа целиком и поиск секции через stack()"""
+    dataframe = pd.read_excel(io.BytesIO(content), sheet_name=XLSExtractor.sheet_name, header=None)
+    match = dataframe.stack().astype(str).str.contains(XLSExtractor.table_name)
+    start_idx = match[match].index.get_level_values(0).unique()[0]
+    df = dataframe.iloc[start_idx + 1 :].reset_index(drop=True)
+    df.columns = df.iloc[0].astype(str).str.replace("\n", " ").str.strip()
+    return df.iloc[1:].reset_index(drop=True)
+
+
+def legacy_filter_valid_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Исходная фильтрация строк (двойное приведение к str и int)"""
+    count_col = next(col for col in df.columns if "Количество Договоров" in col)
+    df = df[df[count_col].astype(str).str.isnumeric()]
+    df = df[df[count_col].astype(int) > 0]
+    return df.iloc[:-2]
+
+
+def legacy_to_dict(df: pd.DataFrame, bidding_date: date) -> list[dict]:
+    """Исходное построчное преобразование через iterrows"""
+    current_datetime = datetime.now()
+    records = []
+    for _, row in df.iterrows():
+        records.append(
+            {
+                "exchange_product_id": row["Код Инструмента"],
+                "exchange_product_name": row["Наименование Инструмента"],
+                "oil_id": row["Код Инструмента"][:4],
+                "delivery_basis_id": row["Код Инструмента"][4:7],
+                "delivery_basis_name": row["Базис поставки"],
+                "delivery_type_id": row["Код Инструмента"][-1],
+                "volume": int(row["Объем Договоров в единицах измерения"]),
+                "total": Decimal(row["Обьем Договоров, руб."]),
+                "count": int(row["Количество Договоров, шт."]),
+                "date": bidding_date,
+                "created_on": current_datetime,
+                "updated_on": current_datetime,
+            }
+        )
+    return records
+
+
+def timeit(func, repeat: int) -> float:
+    """Возвращает лучшее время выполнения `func` из `repeat` запусков"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_file(path: Path, repeat: int) -> float:
+    """Замеряет оба варианта на одном файле и возвращает ускорение преобразования"""
+    content = path.read_bytes()
+    bidding_date = date.today()
+
+    def load() -> pd.DataFrame:
+        return XLSExtractor(io.BytesIO(content), bidding_date)._extract_table()
+
+    legacy_load = timeit(lambda: legacy_extract_table(content), repeat)
+    current_load = timeit(load, repeat)
+    print(f"{path.name}: чтение и поиск секции {legacy_load * 1000:.2f} мс -> {current_load * 1000:.2f} мс")
+
+    legacy_table = legacy_extract_table(content)
+    extractor = XLSExtractor(io.BytesIO(content), bidding_date)
+    table = extractor._extract_table()
+    legacy = timeit(lambda: legacy_to_dict(legacy_filter_valid_rows(legacy_table), bidding_date), repeat)
+    vectorized = timeit(lambda: extractor._to_dict(extractor._filter_valid_rows(table)), repeat)
+    rows = len(extractor._to_dict(extractor._filter_valid_rows(table)))
+    speedup = legacy / vectorized
+    print(
+        f"{path.name}: {rows} строк, iterrows {legacy * 1000:.2f} мс, "
+        f"векторно {vectorized * 1000:.2f} мс, ускорение x{speedup:.1f}"
+    )
+    return speedup
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("files", nargs="+", type=Path, help="файлы бюллетеней *.xls")
+    arg_parser.add_argument("--repeat", type=int, default=20, help="количество повторов")
+    args = arg_parser.parse_args()
+    speedups = [bench_file(path, args.repeat) for path in args.files]
+    print(f"Среднее ускорение: x{sum(speedups) / len(speedups):.1f}")
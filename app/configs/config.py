@@ -10,11 +10,23 @@ class Settings(BaseSettings):
     DB_PORT: str
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
+    DB_POOL_SIZE: int = 20  # Постоянных соединений в пуле
+    DB_MAX_OVERFLOW: int = 10  # Дополнительных соединений сверх DB_POOL_SIZE при пиковой нагрузке
+    DB_POOL_TIMEOUT: float = 60  # Ожидание свободного соединения, сек.
+    DB_POOL_PRE_PING: bool = False  # Проверка соединения запросом перед каждой выдачей из пула
+    DB_POOL_RECYCLE: int = 1800  # Пересоздание соединений старше заданного возраста, сек. (-1 - без ограничения)
+    DB_REPLICA_URL: str | None = None  # URL реплики для чтения (SQLAlchemy); без него чтение идет с основной БД
+    DB_REPLICA_CONNECT_TIMEOUT: float = 5  # Таймаут подключения к реплике, сек.
+    DB_REPLICA_RETRY_AFTER: float = 30  # Через сколько секунд снова пробовать реплику после ошибки
 
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int
     REDIS_DB: int
     CACHE_PREFIX: str = "fastapi-cache"
+    CACHE_TTL: int = 24 * 60 * 60  # Резервное время жизни записей кэша, сек. (основной сброс - по событию загрузки)
+    CACHE_TTL_JITTER: float = 0.1  # Случайный разброс времени жизни, доля от CACHE_TTL
+    CACHE_L1_MAX_ENTRIES: int = 1024  # Размер кэша в памяти процесса (первый уровень), записей
+    CACHE_L1_TTL: int = 300  # Время жизни записей кэша в памяти процесса, сек.
 
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -1,11 +1,183 @@
-from sqlalchemy import insert
+import time
+from datetime import date
+from typing import NamedTuple
+
+from sqlalchemy import Boolean, func, literal_column, select, text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.database import async_context_session
-from database.models import SpimexTradingResults
+from database.models import SpimexTradingResults, TradingDay
+from utils.metrics import Histogram
+
+UPSERT_BATCH_SIZE = 1000  # Количество строк в одном INSERT ... ON CONFLICT
+CONFLICT_CONSTRAINT = "uq_spimex_trading_results_product_date"
+UPDATE_COLUMNS = (
+    "exchange_product_name",
+    "oil_id",
+    "delivery_basis_id",
+    "delivery_basis_name",
+    "delivery_type_id",
+    "volume",
+    "total",
+    "count",
+)
+COPY_COLUMNS = (
+    "exchange_product_id",
+    "exchange_product_name",
+    "oil_id",
+    "delivery_basis_id",
+    "delivery_basis_name",
+    "delivery_type_id",
+    "volume",
+    "total",
+    "count",
+    "date",
+    "created_on",
+    "updated_on",
+)
+STAGING_TABLE = "spimex_trading_results_staging"
+
+insert_seconds = Histogram(
+    "db_insert_seconds", "Время записи торгов одного бюллетеня в spimex_trading_results до коммита (method: upsert, copy)"
+)
+
+
+class UpsertResult(NamedTuple):
+    """Количество вставленных и обновленных строк"""
+
+    inserted: int = 0
+    updated: int = 0
+
+
+def _unique_rows(lst_data: list[dict]) -> list[dict]:
+    """Оставляет по одной (последней) записи на ключ (exchange_product_id, date)"""
+    return list({(row["exchange_product_id"], row["date"]): row for row in lst_data}.values())
+
+
+async def upsert_trades(session: AsyncSession, lst_data: list[dict]) -> UpsertResult:
+    """
+    Пакетно вставляет данные в `SpimexTradingResults` через INSERT ... ON CONFLICT DO UPDATE.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param lst_data: Список словарей с данными торгов.
+    :return: Количество вставленных и обновленных строк.
+    """
+    rows = _unique_rows(lst_data)
+    if not rows:
+        return UpsertResult()
+    start = time.perf_counter()
+    # executemany по Core-таблице: SQLAlchemy собирает строки в многострочные
+    # VALUES пачками по UPSERT_BATCH_SIZE (insertmanyvalues) и кэширует компиляцию
+    stmt = insert(SpimexTradingResults.__table__)
+    stmt = stmt.on_conflict_do_update(
+        constraint=CONFLICT_CONSTRAINT,
+        set_={**{column: stmt.excluded[column] for column in UPDATE_COLUMNS}, "updated_on": func.now()},
+    )
+    # xmax = 0 только у строк, вставленных текущей транзакцией
+    stmt = stmt.returning(literal_column("xmax = 0", Boolean)).execution_options(
+        insertmanyvalues_page_size=UPSERT_BATCH_SIZE
+    )
+    results = await session.scalars(stmt, rows)
+    inserted = sum(1 for is_inserted in results if is_inserted)
+    insert_seconds.observe(time.perf_counter() - start, method="upsert")
+    return UpsertResult(inserted, len(rows) - inserted)
+
+
+async def copy_trades(session: AsyncSession, lst_data: list[dict]) -> UpsertResult:
+    """
+    Загружает данные через бинарный COPY во временную таблицу и переносит их
+    в `SpimexTradingResults` одним INSERT ... SELECT ... ON CONFLICT DO UPDATE.
+
+    Работает только с драйвером asyncpg.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param lst_data: Список словарей с данными торгов.
+    :return: Количество вставленных и обновленных строк.
+    """
+    start = time.perf_counter()
+    table = SpimexTradingResults.__tablename__
+    columns = ", ".join(COPY_COLUMNS)
+    await session.execute(
+        text(f"CREATE TEMP TABLE {STAGING_TABLE} ON COMMIT DROP AS SELECT {columns} FROM {table} WITH NO DATA")
+    )
+    # COPY выполняется на том же соединении и в той же транзакции, что и сессия
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        STAGING_TABLE,
+        records=[tuple(row[column] for column in COPY_COLUMNS) for row in _unique_rows(lst_data)],
+        columns=COPY_COLUMNS,
+    )
+    update_set = ", ".join(f"{column} = EXCLUDED.{column}" for column in UPDATE_COLUMNS)
+    result = await session.execute(
+        text(
+            f"""
+            WITH upserted AS (
+                INSERT INTO {table} ({columns})
+                SELECT {columns} FROM {STAGING_TABLE}
+                ON CONFLICT ON CONSTRAINT {CONFLICT_CONSTRAINT}
+                DO UPDATE SET {update_set}, updated_on = now()
+                RETURNING xmax = 0 AS inserted
+            )
+            SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM upserted
+            """
+        )
+    )
+    inserted, updated = result.one()
+    insert_seconds.observe(time.perf_counter() - start, method="copy")
+    return UpsertResult(inserted, updated)
+
+
+async def refresh_trading_days(session: AsyncSession, dates: set[date]) -> None:
+    """
+    Пересчитывает агрегаты `TradingDay` по результатам торгов за указанные даты.
+
+    Вызывается в той же транзакции, что и загрузка данных, поэтому таблица
+    торговых дней всегда согласована с таблицей результатов.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param dates: Даты, данные за которые были изменены.
+    """
+    if not dates:
+        return
+    model = SpimexTradingResults
+    stmt = insert(TradingDay).from_select(
+        ["date", "row_count", "total_volume", "total_amount"],
+        select(model.date, func.count(), func.sum(model.volume), func.sum(model.total))
+        .where(model.date.in_(dates))
+        .group_by(model.date),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TradingDay.date],
+        set_={
+            "row_count": stmt.excluded.row_count,
+            "total_volume": stmt.excluded.total_volume,
+            "total_amount": stmt.excluded.total_amount,
+            "updated_on": func.now(),
+        },
+    )
+    await session.execute(stmt)
+
+
+@async_context_session
+async def mass_create_trade(session: AsyncSession, lst_data: list[dict]) -> UpsertResult:
+    """Выполняет массовую вставку (upsert) данных в таблицу `SpimexTradingResults`"""
+    result = await upsert_trades(session, lst_data)
+    await refresh_trading_days(session, {row["date"] for row in lst_data})
+    return result
+
+
+@async_context_session
+async def copy_create_trade(session: AsyncSession, lst_data: list[dict]) -> UpsertResult:
+    """Выполняет массовую загрузку данных в таблицу `SpimexTradingResults` через COPY"""
+    result = await copy_trades(session, lst_data)
+    await refresh_trading_days(session, {row["date"] for row in lst_data})
+    return result
 
 
 @async_context_session
-async def mass_create_trade(session: AsyncSession, lst_data: list[dict]) -> None:
-    """Выполняет массовую вставку данных в таблицу `SpimexTradingResults`"""
-    await session.execute(insert(SpimexTradingResults), lst_data)
+async def get_trading_dates(session: AsyncSession) -> set[date]:
+    """Возвращает множество дат торгов, уже загруженных в таблицу `SpimexTradingResults`"""
+    results = await session.scalars(select(TradingDay.date))
+    return set(results.all())
@@ -1,22 +1,196 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
 from functools import wraps
-from typing import Any, Callable
+from typing import Any, AsyncIterator, Callable
 
-from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncAttrs, create_async_engine
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy import Connection, Engine, event, make_url
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import (
+    async_sessionmaker,
+    AsyncAttrs,
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+)
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
 
+from app.configs.logging_config import logger
 from configs.config import settings
+from utils.metrics import Counter, Gauge, Histogram
 
 DATABASE_URL = settings.get_db_postgres_url()
 # DATABASE_URL = settings.get_db_sqlite_url()
 
-engine = create_async_engine(DATABASE_URL, pool_size=20, max_overflow=10, pool_timeout=60, pool_pre_ping=True)
+POOL_CHECKOUT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Ошибки подключения к реплике, после которых чтение переключается на основную БД. Ожидание
+# соединения из заполненного пула (sqlalchemy.exc.TimeoutError) сюда не входит: это не отказ реплики
+REPLICA_ERRORS = (OSError, asyncio.TimeoutError, OperationalError, InterfaceError)
+
+pool_checkout_seconds = Histogram(
+    "db_pool_checkout_seconds",
+    "Время получения соединения из пула (ожидание свободного или открытие нового)",
+    buckets=POOL_CHECKOUT_BUCKETS,
+)
+pool_in_use = Gauge("db_pool_connections_in_use", "Соединений БД, выданных из пула")
+replica_fallbacks = Counter("db_replica_fallbacks", "Переключения чтения с реплики на основную БД")
+query_seconds = Histogram(
+    "db_query_seconds",
+    "Время выполнения SQL-запроса до получения результата (pool; statement: SELECT, INSERT, WITH, ...)",
+    buckets=QUERY_BUCKETS,
+)
+
+
+class MeasuredPool(AsyncAdaptedQueuePool):
+    """Пул соединений, замеряющий время выдачи соединения (метка `pool` - `metrics_name`)"""
+
+    metrics_name = "default"
+
+    @classmethod
+    def named(cls, name: str) -> type["MeasuredPool"]:
+        """
+        Подкласс пула с именем для меток метрик.
+
+        Имя задается классом, а не аргументом конструктора: при пересоздании
+        (`engine.dispose()`) SQLAlchemy создает пул того же класса только со
+        своими параметрами.
+        """
+        return type(f"{cls.__name__}_{name}", (cls,), {"metrics_name": name})
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_checkout_seconds.observe(time.perf_counter() - start, pool=self.metrics_name)
+
+
+def _measure_queries(async_engine: AsyncEngine, name: str) -> None:
+    """Замеряет время выполнения запросов движка; метка `statement` - первое слово SQL"""
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(async_engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        query_seconds.observe(elapsed, pool=name, statement=statement.lstrip().split(None, 1)[0].upper())
+
+    @event.listens_for(async_engine.sync_engine, "handle_error")
+    def handle_error(context):
+        # after_cursor_execute после ошибки не вызывается
+        if context.connection is not None and context.connection.info.get("query_start"):
+            context.connection.info["query_start"].pop()
+
+
+def build_engine(url: str, name: str, **kwargs: Any) -> AsyncEngine:
+    """
+    Создает движок с пулом соединений по настройкам `DB_POOL_*` и метриками пула.
+
+    :param url: URL базы данных.
+    :param name: Имя движка для метрик и логов пула (primary, replica).
+    :param kwargs: Дополнительные параметры `create_async_engine`.
+    :return: Асинхронный движок SQLAlchemy.
+    """
+    async_engine = create_async_engine(
+        url,
+        poolclass=MeasuredPool.named(name),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_logging_name=name,
+        **kwargs,
+    )
+    pool_in_use.set_function(lambda: async_engine.pool.checkedout(), pool=name)
+    _measure_queries(async_engine, name)
+    return async_engine
+
+
+engine = build_engine(DATABASE_URL, "primary")
+replica_engine = None
+if settings.DB_REPLICA_URL:
+    replica_connect_args = {}
+    if make_url(settings.DB_REPLICA_URL).get_backend_name() == "postgresql":
+        replica_connect_args["timeout"] = settings.DB_REPLICA_CONNECT_TIMEOUT
+    replica_engine = build_engine(settings.DB_REPLICA_URL, "replica", connect_args=replica_connect_args)
 
 
 class BaseModel(AsyncAttrs, DeclarativeBase):
     __abstract__ = True
 
 
+class ReadRouting:
+    """
+    Выбор движка для сессий чтения.
+
+    Если задана реплика, чтение идет с нее; после ошибки подключения реплика
+    считается недоступной `retry_after` секунд, и чтение идет с основной БД.
+    Транзакции на обоих движках открываются как READ ONLY.
+    """
+
+    def __init__(self, primary: AsyncEngine, replica: AsyncEngine | None, retry_after: float):
+        self.primary = primary.execution_options(postgresql_readonly=True)
+        self.replica = replica.execution_options(postgresql_readonly=True) if replica is not None else None
+        self.retry_after = retry_after
+        self.unavailable_until = 0.0
+
+    def engine(self) -> AsyncEngine:
+        """Движок для новой сессии чтения"""
+        if self.replica is not None and time.monotonic() >= self.unavailable_until:
+            return self.replica
+        return self.primary
+
+    def mark_unavailable(self, error: Exception) -> None:
+        """Переключает чтение на основную БД на `retry_after` секунд"""
+        self.unavailable_until = time.monotonic() + self.retry_after
+        replica_fallbacks.inc()
+        logger.warning(f"Реплика недоступна ({error!r}), чтение с основной БД {self.retry_after:.0f} с")
+
+
+class ReadSession(Session):
+    """
+    Синхронная часть сессии чтения: движок выбирается при первом обращении к БД.
+
+    Пока сессия не выполнила запрос, соединение не берется, поэтому запрос API,
+    обслуженный кэшем, не занимает соединение пула. Первое подключение к реплике
+    проверяется: при ошибке подключения реплика отмечается недоступной и сессия
+    работает с основной БД.
+    """
+
+    def get_bind(self, mapper: Any = None, **kwargs: Any) -> Engine | Connection:
+        if self.bind is None:
+            bind = read_routing.engine()
+            if bind is read_routing.replica:
+                try:
+                    # Соединение остается в транзакции сессии и используется ее запросами
+                    self.connection(bind_arguments={"bind": bind.sync_engine})
+                except REPLICA_ERRORS as e:
+                    read_routing.mark_unavailable(e)
+                    bind = read_routing.primary
+            self.bind = bind.sync_engine
+        return self.bind
+
+
 AsyncSessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+# Сессии для эндпоинтов чтения; движок (реплика или основная БД) выбирает ReadSession
+ReadOnlySessionLocal = async_sessionmaker(sync_session_class=ReadSession, expire_on_commit=False, autoflush=False)
+read_routing = ReadRouting(engine, replica_engine, settings.DB_REPLICA_RETRY_AFTER)
+
+
+@asynccontextmanager
+async def read_session() -> AsyncIterator[AsyncSession]:
+    """
+    Открывает сессию только для чтения на реплике или основной БД.
+
+    Соединение берется при первом запросе сессии (см. `ReadSession`).
+    """
+    async with ReadOnlySessionLocal() as session:
+        yield session
 
 
 def async_context_session(func: Callable[..., Any]) -> Callable[..., Any]:
@@ -39,3 +213,13 @@ def async_context_session(func: Callable[..., Any]) -> Callable[..., Any]:
 async def get_db():
     async with AsyncSessionLocal() as db:
         yield db
+
+
+async def get_read_db():
+    """
+    Сессия только для чтения на время запроса (с реплики, если она задана и доступна).
+
+    Соединение берется при первом запросе сессии: запросы, обслуженные кэшем, его не занимают.
+    """
+    async with read_session() as db:
+        yield db
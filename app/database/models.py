@@ -1,7 +1,7 @@
 import datetime as dt
 from decimal import Decimal
 
-from sqlalchemy import Date, func, Numeric, String
+from sqlalchemy import BigInteger, Date, func, Index, Numeric, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from database.database import BaseModel
@@ -9,16 +9,50 @@ from database.database import BaseModel
 
 class SpimexTradingResults(BaseModel):
     __tablename__ = "spimex_trading_results"
+    __table_args__ = (UniqueConstraint("exchange_product_id", "date", name="uq_spimex_trading_results_product_date"),)
+
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     exchange_product_id: Mapped[str] = mapped_column(String(20))
     exchange_product_name: Mapped[str] = mapped_column(String(250))
-    oil_id: Mapped[str] = mapped_column(String(4), index=True)
-    delivery_basis_id: Mapped[str] = mapped_column(String(4), index=True)
+    oil_id: Mapped[str] = mapped_column(String(4))
+    delivery_basis_id: Mapped[str] = mapped_column(String(4))
     delivery_basis_name: Mapped[str] = mapped_column(String(250))
-    delivery_type_id: Mapped[str] = mapped_column(String(4), index=True)
+    delivery_type_id: Mapped[str] = mapped_column(String(4))
     volume: Mapped[int]
     total: Mapped[Decimal] = mapped_column(Numeric(20, 2))
     count: Mapped[int]
-    date: Mapped[dt.date] = mapped_column(Date, index=True)
+    date: Mapped[dt.date] = mapped_column(Date)
     created_on: Mapped[dt.datetime] = mapped_column(server_default=func.now(), default=dt.datetime.now)
     updated_on: Mapped[dt.datetime] = mapped_column(server_default=func.now(), onupdate=dt.datetime.now)
+
+
+# Индексы под фильтры TradingService: равенство по идентификаторам + диапазон дат,
+# порядок (date DESC, id DESC) совпадает с сортировкой и курсором пагинации.
+Index(
+    "ix_spimex_trading_results_product_date",
+    SpimexTradingResults.oil_id,
+    SpimexTradingResults.delivery_basis_id,
+    SpimexTradingResults.delivery_type_id,
+    SpimexTradingResults.date.desc(),
+    SpimexTradingResults.id.desc(),
+    postgresql_include=["volume", "total", "count"],
+)
+Index(
+    "ix_spimex_trading_results_basis_date",
+    SpimexTradingResults.delivery_basis_id,
+    SpimexTradingResults.date.desc(),
+    SpimexTradingResults.id.desc(),
+)
+Index("ix_spimex_trading_results_date_id", SpimexTradingResults.date.desc(), SpimexTradingResults.id.desc())
+
+
+class TradingDay(BaseModel):
+    """Торговый день с агрегатами по загруженным результатам (обновляется при загрузке)"""
+
+    __tablename__ = "trading_days"
+
+    date: Mapped[dt.date] = mapped_column(Date, primary_key=True)
+    row_count: Mapped[int]
+    total_volume: Mapped[int] = mapped_column(BigInteger)
+    total_amount: Mapped[Decimal] = mapped_column(Numeric(24, 2))
+    updated_on: Mapped[dt.datetime] = mapped_column(server_default=func.now(), onupdate=dt.datetime.now)
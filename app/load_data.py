@@ -1,27 +1,145 @@
+import argparse
 import asyncio
 import json
-from datetime import datetime
+import time
+from datetime import date, datetime, timedelta
 from pathlib import Path
 
-from sqlalchemy import insert
+from sqlalchemy import delete, exists, insert, select, text
 
+from database.crud import refresh_trading_days
 from database.database import AsyncSessionLocal
-from database.models import SpimexTradingResults
+from database.models import SpimexTradingResults, TradingDay
 
 filepath = Path(__file__).parent / "fixtures.json"
 
+SYNTHETIC_PREFIX = "SYN"  # Префикс exchange_product_id синтетических строк
+SYNTHETIC_PRODUCTS = 2000  # Синтетических инструментов в одном торговом дне
+SYNTHETIC_OILS = 50  # Разных oil_id (S000..S049)
+SYNTHETIC_BASES = 40  # Разных delivery_basis_id (S00..S39)
+SYNTHETIC_BATCH_ROWS = 200_000  # Строк в одной транзакции при генерации
+
+# Строки генерируются в БД: день d (от end_date назад) x инструмент p
+SYNTHETIC_INSERT = text(
+    """
+    INSERT INTO spimex_trading_results (
+        exchange_product_id, exchange_product_name, oil_id, delivery_basis_id, delivery_basis_name,
+        delivery_type_id, volume, total, count, date, created_on, updated_on
+    )
+    SELECT
+        :prefix || lpad(p::text, 7, '0'),
+        'Синтетический продукт ' || p,
+        'S' || lpad((p % :oils)::text, 3, '0'),
+        'S' || lpad((p / :oils % :bases)::text, 2, '0'),
+        'Синтетический базис ' || (p / :oils % :bases),
+        CASE WHEN p % 3 = 0 THEN 'A' ELSE 'F' END,
+        v.volume,
+        v.volume * (50000 + (d * 31 + p * 17) % 20000),
+        1 + (d + p) % 9,
+        CAST(:end_date AS date) - d,
+        now(),
+        now()
+    FROM generate_series(CAST(:first_day AS integer), CAST(:last_day AS integer)) AS d
+    CROSS JOIN generate_series(0, CAST(:products AS integer) - 1) AS p
+    CROSS JOIN LATERAL (SELECT 1 + (d * 7919 + p * 104729) % 1000 AS volume) AS v
+    ON CONFLICT ON CONSTRAINT uq_spimex_trading_results_product_date DO NOTHING
+    """
+)
+
 
 async def load_fixtures(filepath):
     async with AsyncSessionLocal() as session:
         with open(filepath, encoding="utf-8") as file:
             json_file = json.load(file)
+            dates = set()
             for row in json_file:
                 date = row.pop("date")
                 date = datetime.strptime(date, "%Y-%m-%d").date()
+                dates.add(date)
                 query = insert(SpimexTradingResults).values(**row, date=date)
                 await session.execute(query)
+            await refresh_trading_days(session, dates)
+            await session.commit()
+
+
+async def load_synthetic(rows: int, end_date: date, products: int = SYNTHETIC_PRODUCTS) -> None:
+    """
+    Генерирует синтетический набор результатов торгов для нагрузочных тестов.
+
+    Торговые дни идут назад от `end_date`, в каждом `products` инструментов
+    с `SYNTHETIC_OILS` видами продукта и `SYNTHETIC_BASES` базисами поставки.
+    Повторный запуск с теми же параметрами ничего не добавляет.
+
+    :param rows: Число строк (округляется вверх до целого числа дней).
+    :param end_date: Последний торговый день набора.
+    :param products: Число инструментов в дне.
+    """
+    days = -(-rows // products)
+    days_per_batch = max(1, SYNTHETIC_BATCH_ROWS // products)
+    start = time.perf_counter()
+    for first_day in range(0, days, days_per_batch):
+        last_day = min(first_day + days_per_batch, days) - 1
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                SYNTHETIC_INSERT,
+                {
+                    "prefix": SYNTHETIC_PREFIX,
+                    "oils": SYNTHETIC_OILS,
+                    "bases": SYNTHETIC_BASES,
+                    "products": products,
+                    "end_date": end_date,
+                    "first_day": first_day,
+                    "last_day": last_day,
+                },
+            )
+            await refresh_trading_days(
+                session, {end_date - timedelta(days=d) for d in range(first_day, last_day + 1)}
+            )
             await session.commit()
+        print(f"Дней {last_day + 1}/{days}, {time.perf_counter() - start:.0f} с")
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("ANALYZE spimex_trading_results"))
+        await session.commit()
+
+
+async def purge_synthetic() -> None:
+    """Удаляет синтетические строки и пересчитывает затронутые торговые дни"""
+    model = SpimexTradingResults
+    synthetic = model.exchange_product_id.startswith(SYNTHETIC_PREFIX)
+    async with AsyncSessionLocal() as session:
+        dates = set(await session.scalars(select(model.date).where(synthetic).distinct()))
+        await session.execute(delete(model).where(synthetic))
+        await refresh_trading_days(session, dates)
+        await session.execute(
+            delete(TradingDay).where(
+                TradingDay.date.in_(dates), ~exists(select(model.id).where(model.date == TradingDay.date))
+            )
+        )
+        await session.commit()
+    print(f"Удалены синтетические торги за {len(dates)} дней")
+
+
+def parse_args() -> argparse.Namespace:
+    """Разбирает аргументы командной строки"""
+    arg_parser = argparse.ArgumentParser(description="Загрузка тестовых данных в БД")
+    arg_parser.add_argument(
+        "--synthetic", type=int, metavar="ROWS", help="сгенерировать ROWS синтетических строк вместо fixtures.json"
+    )
+    arg_parser.add_argument(
+        "--products", type=int, default=SYNTHETIC_PRODUCTS, help="синтетических инструментов в торговом дне"
+    )
+    arg_parser.add_argument(
+        "--end-date", type=date.fromisoformat, default=date.today(), help="последний синтетический торговый день"
+    )
+    arg_parser.add_argument("--purge", action="store_true", help="удалить синтетические строки")
+    return arg_parser.parse_args()
 
 
 if __name__ == "__main__":
-    asyncio.run(load_fixtures(filepath))
+    args = parse_args()
+    if args.purge:
+        asyncio.run(purge_synthetic())
+    elif args.synthetic:
+        asyncio.run(load_synthetic(args.synthetic, args.end_date, args.products))
+    else:
+        asyncio.run(load_fixtures(filepath))
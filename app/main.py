@@ -1,8 +1,13 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 
+from api.middleware import MetricsMiddleware
 from api.routers.tradings import router as trading_router
+from utils.cache import generation
+from utils.metrics import REGISTRY
 from utils.redis_client import init_redis
 
 
@@ -11,18 +16,28 @@ async def lifespan(app: FastAPI):
     """
     Контекстный менеджер для управления жизненным циклом приложения.
 
-    Инициализирует подключение к Redis при запуске приложения
-    и закрывает его при завершении работы.
+    Инициализирует подключение к Redis и подписку на события загрузки торгов
+    при запуске приложения и закрывает их при завершении работы.
 
     :param app: Экземпляр FastAPI.
     """
 
     redis_client = await init_redis()
+    watcher = asyncio.create_task(generation.watch(redis_client))
     yield
+    watcher.cancel()
+    with suppress(asyncio.CancelledError):
+        await watcher
     await redis_client.close()
 
 
 app = FastAPI(title="Spimex Trading API", lifespan=lifespan)
-
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(trading_router, prefix="/trading", tags=["Trading"])
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    """Метрики приложения в текстовом формате Prometheus"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,41 @@
+"""Add unique constraint on exchange_product_id and date
+
+Revision ID: 5d1e7c9a4b2f
+Revises: 72e7725c3bec
+Create Date: 2026-10-18 09:12:40.318204
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5d1e7c9a4b2f'
+down_revision: Union[str, None] = '72e7725c3bec'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Удаляем дубликаты, оставляя самую позднюю запись для каждой пары (продукт, дата)
+    op.execute(
+        sa.text(
+            """
+            DELETE FROM spimex_trading_results AS t
+            USING spimex_trading_results AS d
+            WHERE t.exchange_product_id = d.exchange_product_id
+              AND t.date = d.date
+              AND t.id < d.id
+            """
+        )
+    )
+    op.create_unique_constraint(
+        'uq_spimex_trading_results_product_date', 'spimex_trading_results', ['exchange_product_id', 'date']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_spimex_trading_results_product_date', 'spimex_trading_results', type_='unique')
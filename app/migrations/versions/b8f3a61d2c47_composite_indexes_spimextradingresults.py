@@ -0,0 +1,61 @@
+"""Replace single-column indexes with composite indexes in SpimexTradingResults
+
+Revision ID: b8f3a61d2c47
+Revises: 5d1e7c9a4b2f
+Create Date: 2026-10-18 11:02:17.504126
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8f3a61d2c47'
+down_revision: Union[str, None] = '5d1e7c9a4b2f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE/DROP INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_spimex_trading_results_product_date',
+            'spimex_trading_results',
+            ['oil_id', 'delivery_basis_id', 'delivery_type_id', sa.text('date DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_include=['volume', 'total', 'count'],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_spimex_trading_results_basis_date',
+            'spimex_trading_results',
+            ['delivery_basis_id', sa.text('date DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_spimex_trading_results_date_id',
+            'spimex_trading_results',
+            [sa.text('date DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index('ix_spimex_trading_results_oil_id', table_name='spimex_trading_results', postgresql_concurrently=True)
+        op.drop_index('ix_spimex_trading_results_delivery_type_id', table_name='spimex_trading_results', postgresql_concurrently=True)
+        op.drop_index('ix_spimex_trading_results_delivery_basis_id', table_name='spimex_trading_results', postgresql_concurrently=True)
+        op.drop_index('ix_spimex_trading_results_date', table_name='spimex_trading_results', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_spimex_trading_results_date', 'spimex_trading_results', ['date'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_spimex_trading_results_delivery_basis_id', 'spimex_trading_results', ['delivery_basis_id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_spimex_trading_results_delivery_type_id', 'spimex_trading_results', ['delivery_type_id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_spimex_trading_results_oil_id', 'spimex_trading_results', ['oil_id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_spimex_trading_results_date_id', table_name='spimex_trading_results', postgresql_concurrently=True)
+        op.drop_index('ix_spimex_trading_results_basis_date', table_name='spimex_trading_results', postgresql_concurrently=True)
+        op.drop_index('ix_spimex_trading_results_product_date', table_name='spimex_trading_results', postgresql_concurrently=True)
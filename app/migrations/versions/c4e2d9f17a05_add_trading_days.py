@@ -0,0 +1,46 @@
+"""Add trading_days table
+
+Revision ID: c4e2d9f17a05
+Revises: b8f3a61d2c47
+Create Date: 2026-10-18 12:05:11.540712
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e2d9f17a05'
+down_revision: Union[str, None] = 'b8f3a61d2c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'trading_days',
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.Column('total_volume', sa.BigInteger(), nullable=False),
+        sa.Column('total_amount', sa.Numeric(precision=24, scale=2), nullable=False),
+        sa.Column('updated_on', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('date'),
+    )
+    # Заполняем агрегаты по уже загруженным результатам
+    op.execute(
+        sa.text(
+            """
+            INSERT INTO trading_days (date, row_count, total_volume, total_amount)
+            SELECT date, count(*), sum(volume), sum(total)
+            FROM spimex_trading_results
+            GROUP BY date
+            """
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('trading_days')
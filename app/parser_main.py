@@ -1,88 +1,241 @@
+import argparse
 import asyncio
+import os
 import time
 from datetime import date, datetime
+from pathlib import Path
 
-from aiohttp import ClientSession, TCPConnector
-from sqlalchemy.exc import SQLAlchemyError
+import aiohttp
+from redis.exceptions import RedisError
 
-from database.crud import mass_create_trade
-from exceptions import XLSExtractorError
+from database.crud import copy_create_trade, get_trading_dates, mass_create_trade
+from configs.config import settings
 from app.configs.logging_config import logger
-from parsers.parser import Parser
-from parsers.scraper import fetch_file, fetch_page
-from utils.file_utils import XLSExtractor
+from parsers.cache import FileCache
+from parsers.http_policy import HttpPolicy
+from parsers.pipeline import IngestionPipeline, Loader, PipelineConfig
+from utils.metrics import Gauge, REGISTRY
+from utils.redis_client import get_redis, publish_trading_update
 
 BASE_URL = "https://spimex.com"
-PAGE_URL = BASE_URL + "/markets/oil_products/trades/results/"
+PAGE_PATH = "/markets/oil_products/trades/results/"
+PAGE_URL = BASE_URL + PAGE_PATH
 CURRENT_YEAR = datetime.now().year
 MIN_YEAR = 2023
 FIRST_PAGE = 1
 LAST_PAGE = 55
+MAX_PAGE_REQUESTS = 3  # Максимальное число одновременных запросов страниц
 MAX_CONCURRENT_REQUESTS = 15  # Максимальное число одновременных запросов
 MAX_DB_CONCURRENT = 10  # Ограничение для операций с базой данных
-
-
-async def download_data(session: ClientSession, url: str, bidding_date: date, semaphore: asyncio.Semaphore) -> None:
-    """Скачивает файл, обрабатывает его и сохраняет данные в БД"""
+PARSE_WORKERS = os.cpu_count() or 1  # Количество процессов для разбора xls-файлов
+QUEUE_SIZE = 10  # Размер очередей между этапами конвейера
+CACHE_DIR = settings.BASE_DIR / "cache"  # Каталог дискового кэша страниц и файлов
+CACHE_MAX_MB = 1024  # Максимальный размер дискового кэша, МБ
+REQUESTS_PER_SECOND = 10.0  # Ограничение частоты запросов к бирже
+MAX_RETRIES = 4  # Количество повторов запроса при 5xx/429 и сетевых ошибках
+REQUEST_TIMEOUT = 60.0  # Таймаут одного запроса, сек.
+SPOOL_MAX_KB = 1024  # Порог, после которого скачиваемый файл сбрасывается на диск, КБ
+PUSHGATEWAY_JOB = "spimex_parser"  # Имя задания (группа метрик) в Pushgateway
+PUSH_TIMEOUT = 10.0  # Таймаут отправки метрик в Pushgateway, сек.
+
+run_duration = Gauge("spimex_parser_duration_seconds", "Длительность последнего запуска загрузки")
+run_finished = Gauge("spimex_parser_last_run_timestamp_seconds", "Время окончания последнего запуска загрузки (unix)")
+rows_written = Gauge("spimex_parser_rows_written", "Строк добавлено или обновлено последним запуском загрузки")
+
+LOADERS: dict[str, Loader] = {
+    "upsert": mass_create_trade,  # Пакетный INSERT ... ON CONFLICT
+    "copy": copy_create_trade,  # Бинарный COPY через asyncpg во временную таблицу
+}
+
+
+async def main(
+    loader: Loader = mass_create_trade,
+    parse_workers: int = PARSE_WORKERS,
+    incremental: bool = False,
+    page_workers: int = MAX_PAGE_REQUESTS,
+    download_workers: int = MAX_CONCURRENT_REQUESTS,
+    db_workers: int = MAX_DB_CONCURRENT,
+    queue_size: int = QUEUE_SIZE,
+    cache: FileCache | None = None,
+    offline: bool = False,
+    http_policy: HttpPolicy | None = None,
+    spool_max_kb: int = SPOOL_MAX_KB,
+    base_url: str = BASE_URL,
+    page_path: str = PAGE_PATH,
+    last_page: int = LAST_PAGE,
+    min_year: int = MIN_YEAR,
+    current_year: int = CURRENT_YEAR,
+    notify: bool = True,
+) -> IngestionPipeline:
+    """
+    Главный модуль.
+
+    В инкрементальном режиме страницы обходятся по одной от новых к старым,
+    скачиваются только бюллетени за даты, которых еще нет в БД.
+    В режиме offline страницы и файлы берутся только из дискового кэша.
+    Адрес биржи, число страниц и диапазон лет можно переопределить
+    (например, для бенчмарка на локальном сервере); при `notify=False`
+    событие о загрузке в Redis не публикуется.
+
+    :return: Отработавший конвейер со статистикой по этапам.
+    """
+    known_dates = None
+    if incremental:
+        known_dates = await get_trading_dates()
+        logger.info(f"В БД уже есть торги за {len(known_dates)} дат")
+        page_workers = 1
+
+    config = PipelineConfig(
+        base_url=base_url,
+        page_url=base_url + page_path,
+        first_page=FIRST_PAGE,
+        last_page=last_page,
+        min_year=min_year,
+        current_year=current_year,
+        page_workers=page_workers,
+        download_workers=download_workers,
+        parse_workers=parse_workers,
+        db_workers=db_workers,
+        queue_size=queue_size,
+        cache=cache,
+        offline=offline,
+        http_policy=http_policy or HttpPolicy(),
+        spool_max_size=spool_max_kb * 1024,
+    )
+    pipeline = IngestionPipeline(config, loader, known_dates)
     try:
-        byte_file = await fetch_file(session, url)
-
-        # Создаем класс извлекающий нужные данные из файла xls
-        xls_extractor = XLSExtractor(byte_file, bidding_date)
-        data = xls_extractor.get_data()
-        logger.info(f"Данные готовы к загрузке в БД для даты {bidding_date}")
-        # Сохраняем данные в БД
-        async with semaphore:
-            await mass_create_trade(data)
-            logger.info(f"Данные загружены в БД с торгами {bidding_date}")
-    except XLSExtractorError as e:
-        logger.error(e)
-    except SQLAlchemyError as e:
-        logger.error(f"Ошибка при сохранении данных б БД: {e}")
+        await pipeline.run()
     except Exception as e:
         logger.error(f"Неизвестная ошибка: {e}")
+    rows_written.set(pipeline.rows_written)
+    if notify and pipeline.loaded_dates:
+        await notify_api(pipeline.loaded_dates)
+    return pipeline
 
 
-async def process_page(session: ClientSession, page: int, semaphore: asyncio.Semaphore):
-    """Обрабатывает одну страницу: парсит ссылки и загружает файлы"""
-    page_html = await fetch_page(session, PAGE_URL, params={"page": f"page-{page}"})
-    if page_html is None:
-        logger.error(f"Пропускаем страницу {page}, так как HTML не был загружен")
-        return
-    logger.info(f"Страница {page} получена.")
+async def notify_api(dates: set[date]) -> None:
+    """Сообщает экземплярам API о новых данных, чтобы они сбросили кэш"""
+    redis_client = await get_redis()
+    try:
+        generation = await publish_trading_update(redis_client, dates)
+        logger.info(f"Опубликовано событие загрузки торгов за {len(dates)} дат, поколение данных {generation}")
+    except RedisError as e:
+        logger.error(f"Не удалось опубликовать событие загрузки торгов: {e!r}")
+    finally:
+        await redis_client.close()
 
-    # Создаем класс Parser и извлекаем ссылки на файлы и даты торгов
-    parser = Parser(page_html, MIN_YEAR, CURRENT_YEAR)
-    file_links: list[tuple[str, date]] = parser.extract_file_links()
 
-    # Создаем задачи для скачивания файлов и сохранения в БД
-    tasks = []
-    for link, bidding_date in file_links:
-        tasks.append(asyncio.create_task(download_data(session, BASE_URL + link, bidding_date, semaphore)))
-    await asyncio.gather(*tasks)
-    logger.info(f"Страница {page} загружена")
+def dump_metrics(path: Path) -> None:
+    """
+    Записывает метрики в файл в текстовом формате Prometheus
+    (например, для textfile collector node_exporter).
 
+    Файл заменяется атомарно, чтобы сборщик не прочитал его наполовину записанным.
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(REGISTRY.render(), encoding="utf-8")
+    tmp_path.replace(path)
 
-async def main():
-    """Главный модуль"""
-    tasks = []
-    semaphore_db = asyncio.Semaphore(MAX_DB_CONCURRENT)
-    connector = TCPConnector(limit=MAX_CONCURRENT_REQUESTS)
 
-    # В цикле проходимся по страницам со ссылка на файлы
-    async with ClientSession(connector=connector) as session:
-        for page in range(FIRST_PAGE, LAST_PAGE + 1):
-            tasks.append(asyncio.create_task(process_page(session, page, semaphore_db)))
+async def push_metrics(url: str, job: str = PUSHGATEWAY_JOB) -> None:
+    """
+    Отправляет метрики в Prometheus Pushgateway.
 
-        try:
-            await asyncio.gather(*tasks)
-            logger.info("Загрузка завершена")
-        except Exception as e:
-            logger.error(f"Неизвестная ошибка: {e}")
+    PUT заменяет все метрики группы `job`, поэтому в Pushgateway остаются
+    значения последнего запуска.
+
+    :param url: Адрес Pushgateway, например http://pushgateway:9091.
+    :param job: Имя задания.
+    """
+    timeout = aiohttp.ClientTimeout(total=PUSH_TIMEOUT)
+    try:
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.put(
+                f"{url.rstrip('/')}/metrics/job/{job}",
+                data=REGISTRY.render().encode(),
+                headers={"Content-Type": "text/plain; version=0.0.4"},
+            ) as response:
+                response.raise_for_status()
+        logger.info(f"Метрики отправлены в Pushgateway {url}")
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Не удалось отправить метрики в Pushgateway: {e!r}")
+
+
+def parse_args() -> argparse.Namespace:
+    """Разбирает аргументы командной строки"""
+    arg_parser = argparse.ArgumentParser(description="Загрузка бюллетеней торгов SPIMEX")
+    arg_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="загружать только новые даты торгов, останавливаясь на уже загруженных",
+    )
+    arg_parser.add_argument(
+        "--loader",
+        choices=LOADERS,
+        default="upsert",
+        help="способ записи в БД: upsert (INSERT ... ON CONFLICT) или copy (COPY для больших бэкфиллов)",
+    )
+    arg_parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=PARSE_WORKERS,
+        help="количество процессов для разбора xls-файлов (по умолчанию число ядер)",
+    )
+    arg_parser.add_argument("--page-workers", type=int, default=MAX_PAGE_REQUESTS, help="воркеры загрузки страниц")
+    arg_parser.add_argument(
+        "--download-workers", type=int, default=MAX_CONCURRENT_REQUESTS, help="воркеры скачивания файлов"
+    )
+    arg_parser.add_argument("--db-workers", type=int, default=MAX_DB_CONCURRENT, help="воркеры записи в БД")
+    arg_parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE, help="размер очередей между этапами")
+    arg_parser.add_argument("--cache-dir", type=Path, default=CACHE_DIR, help="каталог дискового кэша")
+    arg_parser.add_argument("--cache-max-mb", type=int, default=CACHE_MAX_MB, help="размер дискового кэша, МБ")
+    arg_parser.add_argument("--no-cache", action="store_true", help="не использовать дисковый кэш")
+    arg_parser.add_argument("--offline", action="store_true", help="брать страницы и файлы только из кэша")
+    arg_parser.add_argument(
+        "--rate", type=float, default=REQUESTS_PER_SECOND, help="запросов в секунду к бирже (token bucket)"
+    )
+    arg_parser.add_argument("--max-retries", type=int, default=MAX_RETRIES, help="повторов запроса при ошибках")
+    arg_parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT, help="таймаут запроса, сек.")
+    arg_parser.add_argument(
+        "--spool-kb",
+        type=int,
+        default=SPOOL_MAX_KB,
+        help="сколько КБ скачиваемого файла держать в памяти, прежде чем сбросить его на диск",
+    )
+    arg_parser.add_argument("--metrics-file", type=Path, help="записать метрики запуска в файл (формат Prometheus)")
+    arg_parser.add_argument("--pushgateway", help="отправить метрики запуска в Pushgateway по этому адресу")
+    args = arg_parser.parse_args()
+    if args.offline and args.no_cache:
+        arg_parser.error("--offline требует дискового кэша")
+    return args
 
 
 if __name__ == "__main__":
+    args = parse_args()
+    file_cache = None if args.no_cache else FileCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
     start_time = time.perf_counter()
-    asyncio.run(main())
+    asyncio.run(
+        main(
+            loader=LOADERS[args.loader],
+            parse_workers=args.parse_workers,
+            incremental=args.incremental,
+            page_workers=args.page_workers,
+            download_workers=args.download_workers,
+            db_workers=args.db_workers,
+            queue_size=args.queue_size,
+            cache=file_cache,
+            offline=args.offline,
+            http_policy=HttpPolicy(
+                total_timeout=args.timeout, max_retries=args.max_retries, rate=args.rate, burst=max(args.rate, 1)
+            ),
+            spool_max_kb=args.spool_kb,
+        )
+    )
     end_time = time.perf_counter()
     logger.info(f"Время выполнения: {end_time - start_time}")
+    run_duration.set(end_time - start_time)
+    run_finished.set(time.time())
+    if args.metrics_file:
+        dump_metrics(args.metrics_file)
+    if args.pushgateway:
+        asyncio.run(push_metrics(args.pushgateway))
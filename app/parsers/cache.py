@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import shutil
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+from app.configs.logging_config import logger
+
+
+@dataclass
+class CacheEntry:
+    """Метаданные ответа для условных запросов и путь к закэшированному содержимому"""
+
+    url: str
+    etag: str | None = None
+    last_modified: str | None = None
+    encoding: str | None = None
+    path: Path | None = None
+
+    def open(self) -> BinaryIO:
+        """Открывает закэшированное содержимое на чтение"""
+        return open(self.path, "rb")
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Заголовки для перепроверки актуальности (If-None-Match / If-Modified-Since)"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class FileCache:
+    """
+    Дисковый кэш загруженных страниц и файлов бюллетеней.
+
+    Ответы хранятся в файлах, названных по sha256 от URL, рядом лежат метаданные
+    (ETag, Last-Modified, кодировка). Общий размер ограничен `max_bytes`:
+    при превышении удаляются давно не использованные записи (LRU по mtime).
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._sizes: OrderedDict[str, int] = self._scan()
+        self._total = sum(self._sizes.values())
+
+    def _scan(self) -> OrderedDict[str, int]:
+        """Строит LRU-индекс существующих записей по времени последнего использования"""
+        entries = []
+        for path in self.directory.glob("*.bin"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        entries.sort()
+        return OrderedDict((key, size) for _, key, size in entries)
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self.directory / f"{key}.bin", self.directory / f"{key}.json"
+
+    def get(self, url: str) -> CacheEntry | None:
+        """Возвращает запись из кэша и отмечает ее как недавно использованную"""
+        key = self._key(url)
+        if key not in self._sizes:
+            return None
+        data_path, meta_path = self._paths(key)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            os.utime(data_path)
+        except (OSError, ValueError) as e:
+            logger.error(f"Поврежденная запись кэша для {url}: {e}")
+            self._remove(key)
+            return None
+        self._sizes.move_to_end(key)
+        return CacheEntry(url, meta.get("etag"), meta.get("last_modified"), meta.get("encoding"), data_path)
+
+    def store(self, entry: CacheEntry, source: BinaryIO) -> CacheEntry:
+        """
+        Копирует содержимое `source` в кэш (атомарно через временный файл)
+        и вытесняет старые записи. Позиция `source` возвращается в начало.
+        """
+        key = self._key(entry.url)
+        data_path, meta_path = self._paths(key)
+        meta = {
+            "url": entry.url,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+            "encoding": entry.encoding,
+        }
+        tmp_path = data_path.with_suffix(".tmp")
+        source.seek(0)
+        with open(tmp_path, "wb") as tmp_file:
+            shutil.copyfileobj(source, tmp_file)
+        source.seek(0)
+        size = tmp_path.stat().st_size
+        os.replace(tmp_path, data_path)
+        meta_path.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+
+        self._total += size - self._sizes.pop(key, 0)
+        self._sizes[key] = size
+        self._evict()
+        entry.path = data_path
+        return entry
+
+    def _evict(self) -> None:
+        """Удаляет наименее недавно использованные записи, пока кэш больше лимита"""
+        while self._total > self.max_bytes and len(self._sizes) > 1:
+            key = next(iter(self._sizes))
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        self._total -= self._sizes.pop(key, 0)
+        for path in self._paths(key):
+            path.unlink(missing_ok=True)
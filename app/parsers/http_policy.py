@@ -0,0 +1,146 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, TypeVar
+
+import aiohttp
+from yarl import URL
+
+from app.configs.logging_config import logger
+from utils.metrics import Counter, Histogram
+
+T = TypeVar("T")
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+RETRY_EXCEPTIONS = (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError)
+
+http_requests = Counter("spimex_http_requests", "Запросы к SPIMEX (включая повторные)")
+http_retries = Counter("spimex_http_retries", "Повторные запросы к SPIMEX по причинам")
+http_failures = Counter("spimex_http_failures", "Запросы к SPIMEX, завершившиеся ошибкой после всех попыток")
+http_latency = Histogram("spimex_http_request_seconds", "Время одного запроса к SPIMEX")
+
+
+class TokenBucket:
+    """Ограничитель частоты запросов: `rate` запросов в секунду с запасом `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Ждет, пока в ведре появится токен, и забирает его"""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class RetryableStatus(Exception):
+    """Ответ с кодом, после которого запрос имеет смысл повторить"""
+
+    def __init__(self, status: int, retry_after: float | None = None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+@dataclass
+class HttpPolicy:
+    """
+    Общая политика HTTP-запросов к бирже.
+
+    Задает таймауты на каждый запрос, повторы с экспоненциальной задержкой
+    и случайным разбросом для 5xx/429 и сетевых ошибок, а также ограничение
+    частоты запросов к каждому хосту (token bucket).
+    """
+
+    total_timeout: float = 60.0  # Таймаут запроса целиком, сек.
+    connect_timeout: float = 10.0  # Таймаут установки соединения, сек.
+    max_retries: int = 4  # Количество повторов после первой попытки
+    backoff_base: float = 0.5  # Базовая задержка перед повтором, сек.
+    backoff_max: float = 30.0  # Максимальная задержка перед повтором, сек.
+    rate: float | None = 10.0  # Запросов в секунду к одному хосту; None - без ограничения
+    burst: float = 10.0  # Допустимый всплеск запросов к одному хосту
+    buckets: dict[str, TokenBucket] = field(default_factory=dict, repr=False)
+
+    @property
+    def timeout(self) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(total=self.total_timeout, sock_connect=self.connect_timeout)
+
+    def _backoff(self, attempt: int) -> float:
+        """Задержка перед повтором: экспонента с полным случайным разбросом"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    async def _throttle(self, host: str) -> None:
+        if self.rate is None:
+            return
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.rate, self.burst)
+        await self.buckets[host].acquire()
+
+    async def get(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        handler: Callable[[aiohttp.ClientResponse], Awaitable[T]],
+        **kwargs: Any,
+    ) -> T:
+        """
+        Выполняет GET-запрос по политике и передает ответ в `handler`.
+
+        Чтение тела ответа должно происходить внутри `handler`, чтобы обрыв
+        соединения во время загрузки тоже приводил к повтору.
+
+        :raises aiohttp.ClientError | asyncio.TimeoutError: если все попытки исчерпаны.
+        """
+        host = URL(url).host or ""
+        attempt = 0
+        while True:
+            await self._throttle(host)
+            http_requests.inc(host=host)
+            start = time.perf_counter()
+            try:
+                async with session.get(url, timeout=self.timeout, **kwargs) as response:
+                    if response.status in RETRY_STATUSES and attempt < self.max_retries:
+                        retry_after = response.headers.get("Retry-After")
+                        raise RetryableStatus(
+                            response.status, float(retry_after) if retry_after and retry_after.isdigit() else None
+                        )
+                    return await handler(response)
+            except RetryableStatus as e:
+                delay = min(e.retry_after, self.backoff_max) if e.retry_after is not None else self._backoff(attempt)
+                reason = str(e.status)
+            except RETRY_EXCEPTIONS as e:
+                if attempt == self.max_retries:
+                    http_failures.inc(host=host)
+                    raise
+                delay = self._backoff(attempt)
+                reason = type(e).__name__
+            except aiohttp.ClientError:
+                http_failures.inc(host=host)
+                raise
+            finally:
+                http_latency.observe(time.perf_counter() - start, host=host)
+            attempt += 1
+            http_retries.inc(host=host, reason=reason)
+            logger.warning(f"Повтор запроса {url} через {delay:.2f} с ({reason}), попытка {attempt}")
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def summary() -> str:
+        """Краткая сводка счетчиков запросов для лога"""
+        count = http_latency.total_count()
+        mean = http_latency.total_sum() / count if count else 0
+        return (
+            f"запросов {http_requests.total():.0f}, повторов {http_retries.total():.0f}, "
+            f"ошибок {http_failures.total():.0f}, средняя задержка {mean:.3f} с"
+        )
@@ -1,56 +1,90 @@
 import re
 from datetime import date
+from typing import Iterator
 
-from bs4 import BeautifulSoup
-from bs4.element import Tag
+import lxml.html
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import etree
 
 from app.configs.logging_config import logger
 
+ITEM_CLASS = "accordeon-inner__item"
+DATE_PATTERN = re.compile(r"(\d{2})\.(\d{2})\.(\d{4})")
+
+
+def _has_class(name: str) -> str:
+    """XPath-условие наличия CSS-класса (аналог селектора `.name`)"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+ITEMS_XPATH = etree.XPath(f"//*[{_has_class(ITEM_CLASS)}]")
+LINK_XPATH = etree.XPath(f"(.//a[{_has_class('link')} and {_has_class('xls')}])[1]/@href")
+DATE_XPATH = etree.XPath(f"(.//*[{_has_class('accordeon-inner__item-inner__title')}]//span)[1]")
+
 
 class Parser:
-    """Парсер страницы с бюллетенями торгов"""
+    """
+    Парсер страницы с бюллетенями торгов.
+
+    По умолчанию использует lxml с заранее скомпилированными XPath-выражениями;
+    `backend="html.parser"` оставляет разбор через BeautifulSoup, который
+    строит дерево только для элементов списка бюллетеней.
+    """
 
-    def __init__(self, content: str, min_year: int, current_year: int):
-        self.soup = BeautifulSoup(content, "html.parser")
+    backends = ("lxml", "html.parser")
+
+    def __init__(self, content: str, min_year: int, current_year: int, backend: str = "lxml"):
+        if backend not in self.backends:
+            raise ValueError(f"Неизвестный парсер {backend}, доступны: {', '.join(self.backends)}")
+        self.backend = backend
+        if backend == "lxml":
+            self.tree = lxml.html.fromstring(content)
+        else:
+            self.soup = BeautifulSoup(content, "html.parser", parse_only=SoupStrainer(class_=ITEM_CLASS))
         self.min_year = min_year
         self.current_year = current_year
 
     def extract_file_links(self) -> list[tuple[str, date]]:
         """Извлечение ссылок на файл и дату торгов"""
         file_links = []
-        for item in self.soup.select(".accordeon-inner__item"):
+        for file_url, date_text in self._iter_items():
             try:
-                link = self._get_link_to_file(item)
-                if not link:
+                if not file_url:
                     continue
-                bidding_date = self._get_bidding_date(item)
+                bidding_date = self._get_bidding_date(date_text)
                 if not bidding_date:
                     continue
                 if not self._check_year(bidding_date):
                     logger.info(f"Дата {bidding_date} вне диапазона [{self.min_year}, {self.current_year}].")
                     break  # Прерываем цикл, если условие не выполняется
-                file_url = link["href"]
-                if file_url:
-                    file_links.append((file_url, bidding_date))
+                file_links.append((file_url, bidding_date))
             except Exception as e:
                 logger.error(f"Ошибка при обработке элемента: {e}", exc_info=True)
         logger.info(f"Найдено {len(file_links)} ссылок")
         return file_links
 
-    def _get_link_to_file(self, tag: Tag) -> str:
-        """Получение ссылки на файл"""
-        return tag.select_one("a.link.xls")
+    def _iter_items(self) -> Iterator[tuple[str | None, str | None]]:
+        """Возвращает ссылку на файл и текст заголовка с датой для каждого бюллетеня"""
+        if self.backend == "lxml":
+            for item in ITEMS_XPATH(self.tree):
+                links = LINK_XPATH(item)
+                date_spans = DATE_XPATH(item)
+                yield (links[0] if links else None), (date_spans[0].text_content() if date_spans else None)
+        else:
+            for item in self.soup.select(f".{ITEM_CLASS}"):
+                link = item.select_one("a.link.xls")
+                date_span = item.select_one(".accordeon-inner__item-inner__title span")
+                yield (link.get("href") if link else None), (date_span.text if date_span else None)
 
-    def _get_bidding_date(self, tag: Tag) -> date | None:
+    def _get_bidding_date(self, date_text: str | None) -> date | None:
         """Получение даты торгов"""
+        if not date_text:
+            return None
         try:
-            date_span = tag.select_one(".accordeon-inner__item-inner__title span")
-            if not date_span:
+            match = DATE_PATTERN.search(date_text.strip())
+            if not match:
                 return None
-            date_text = date_span.text.strip()
-            match = re.search(r"(\d{2})\.(\d{2})\.(\d{4})", date_text)
-            if match:
-                day, month, year = match.groups()
+            day, month, year = match.groups()
             return date(int(year), int(month), int(day))
         except Exception as e:
             logger.error(f"Ошибка при разборе даты: {e}", exc_info=True)
@@ -0,0 +1,253 @@
+import asyncio
+import os
+import time
+from collections import Counter
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Awaitable, BinaryIO, Callable
+
+from aiohttp import ClientSession, TCPConnector
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.configs.logging_config import logger
+from database.crud import UpsertResult
+from exceptions import XLSExtractorError
+from parsers.cache import FileCache
+from parsers.http_policy import HttpPolicy
+from parsers.parser import Parser
+from parsers.scraper import fetch_file, fetch_page, SPOOL_MAX_SIZE, spool_path
+from utils.file_utils import timed_parse_xls
+from utils.metrics import Histogram
+
+Loader = Callable[[list[dict]], Awaitable[UpsertResult]]
+
+STOP = object()  # Сигнал завершения для воркеров этапа
+ROWS_BUCKETS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+stage_latency = Histogram(
+    "spimex_pipeline_stage_seconds",
+    "Время обработки одного элемента этапом конвейера (stage: pages, html, links, files, records)",
+)
+xls_parse_seconds = Histogram("spimex_xls_parse_seconds", "Время разбора одного xls-файла в процессе пула")
+rows_per_file = Histogram("spimex_rows_per_file", "Строк торгов в одном бюллетене", buckets=ROWS_BUCKETS)
+
+
+@dataclass
+class PipelineConfig:
+    """Параметры конвейера загрузки бюллетеней"""
+
+    base_url: str
+    page_url: str
+    first_page: int
+    last_page: int
+    min_year: int
+    current_year: int
+    page_workers: int = 3  # Загрузка страниц со списком бюллетеней
+    link_workers: int = 1  # Извлечение ссылок из html
+    download_workers: int = 15  # Скачивание xls-файлов
+    parse_workers: int = os.cpu_count() or 1  # Процессы для разбора xls-файлов
+    db_workers: int = 10  # Запись в БД
+    queue_size: int = 10  # Размер каждой очереди между этапами
+    monitor_interval: float = 5.0  # Период логирования глубины очередей, сек.
+    cache: FileCache | None = None  # Дисковый кэш страниц и файлов
+    offline: bool = False  # Работать только с кэшем, без сетевых запросов
+    http_policy: HttpPolicy = field(default_factory=HttpPolicy)  # Таймауты, повторы и ограничение частоты
+    spool_max_size: int = SPOOL_MAX_SIZE  # Размер файла, после которого он скачивается на диск, байт
+
+
+class IngestionPipeline:
+    """
+    Конвейер загрузки: страница -> ссылки -> файл -> разбор -> запись в БД.
+
+    Этапы связаны ограниченными очередями `asyncio.Queue`, у каждого этапа свое
+    число воркеров. Заполненная очередь приостанавливает предыдущий этап, поэтому
+    в памяти одновременно находится не больше `queue_size` элементов на этап
+    плюс обрабатываемые воркерами, независимо от числа страниц. Скачанные файлы
+    ждут разбора во временных файлах, в памяти держится не больше `spool_max_size`
+    байт на файл. Процессу пула передается путь к временному файлу, у файлов
+    в памяти и записей дискового кэша передается содержимое.
+
+    В инкрементальном режиме (передан `known_dates`) скачиваются только бюллетени
+    за новые даты, а обход страниц прекращается на первой странице, все даты
+    которой уже загружены (страница, уже запрошенная к этому моменту, дочитывается).
+    """
+
+    stage_names = ("pages", "html", "links", "files", "records")
+
+    def __init__(self, config: PipelineConfig, loader: Loader, known_dates: set[date] | None = None):
+        self.config = config
+        self.loader = loader
+        self.known_dates = known_dates
+        self.stop_pages = asyncio.Event()
+        self.queues: dict[str, asyncio.Queue] = {
+            name: asyncio.Queue(maxsize=config.queue_size) for name in self.stage_names
+        }
+        self.processed: Counter[str] = Counter()
+        self.loaded_dates: set[date] = set()  # Даты, по которым в БД что-то добавлено или обновлено
+        self.stage_seconds: Counter[str] = Counter()  # Суммарное время работы обработчиков по этапам
+        self.rows_written = 0
+        self.session: ClientSession | None = None
+        self.executor: Executor | None = None
+
+    async def run(self) -> None:
+        """Запускает все этапы и дожидается их завершения"""
+        config = self.config
+        stages = (
+            ("pages", self._fetch_page, config.page_workers),
+            ("html", self._extract_links, config.link_workers),
+            ("links", self._download, config.download_workers),
+            ("files", self._parse, config.parse_workers),
+            ("records", self._write, config.db_workers),
+        )
+        connector = TCPConnector(limit=config.page_workers + config.download_workers)
+        with ProcessPoolExecutor(max_workers=config.parse_workers) as executor:
+            async with ClientSession(connector=connector) as session:
+                self.session, self.executor = session, executor
+                monitor = asyncio.create_task(self._monitor())
+                try:
+                    tasks = [self._produce_pages()]
+                    for idx, (name, handler, workers) in enumerate(stages):
+                        outbox, downstream_workers = None, 0
+                        if idx + 1 < len(stages):
+                            outbox, downstream_workers = stages[idx + 1][0], stages[idx + 1][2]
+                        tasks.append(self._run_stage(name, handler, workers, outbox, downstream_workers))
+                    await asyncio.gather(*tasks)
+                finally:
+                    monitor.cancel()
+        logger.info(f"Загрузка завершена, обработано по этапам: {dict(self.processed)}")
+        logger.info(f"HTTP: {config.http_policy.summary()}")
+
+    async def _produce_pages(self) -> None:
+        """Ставит номера страниц в очередь, пока обход не остановлен"""
+        queue = self.queues["pages"]
+        for page in range(self.config.first_page, self.config.last_page + 1):
+            if self.stop_pages.is_set():
+                break
+            await queue.put(page)
+        for _ in range(self.config.page_workers):
+            await queue.put(STOP)
+
+    async def _run_stage(
+        self,
+        name: str,
+        handler: Callable[[Any], Awaitable[list[Any]]],
+        workers: int,
+        outbox: str | None,
+        downstream_workers: int,
+    ) -> None:
+        """Запускает воркеры этапа и после их завершения передает сигнал остановки дальше"""
+        await asyncio.gather(*(self._worker(name, handler, outbox) for _ in range(workers)))
+        if outbox is not None:
+            for _ in range(downstream_workers):
+                await self.queues[outbox].put(STOP)
+
+    async def _worker(self, name: str, handler: Callable[[Any], Awaitable[list[Any]]], outbox: str | None) -> None:
+        """Берет элементы из очереди этапа и кладет результаты в очередь следующего"""
+        inbox = self.queues[name]
+        while True:
+            item = await inbox.get()
+            if item is STOP:
+                return
+            start = time.perf_counter()
+            try:
+                results = await handler(item)
+            except Exception as e:
+                logger.error(f"Неизвестная ошибка на этапе {name}: {e}")
+                continue
+            finally:
+                elapsed = time.perf_counter() - start
+                self.stage_seconds[name] += elapsed
+                stage_latency.observe(elapsed, stage=name)
+            self.processed[name] += 1
+            if outbox is not None:
+                for result in results:
+                    await self.queues[outbox].put(result)
+
+    async def _monitor(self) -> None:
+        """Периодически логирует глубину очередей"""
+        while True:
+            await asyncio.sleep(self.config.monitor_interval)
+            depths = ", ".join(f"{name}={queue.qsize()}/{queue.maxsize}" for name, queue in self.queues.items())
+            logger.info(f"Очереди: {depths}")
+
+    async def _fetch_page(self, page: int) -> list[tuple[int, str]]:
+        """Загружает страницу со ссылками на бюллетени"""
+        if self.stop_pages.is_set():
+            return []
+        page_html = await fetch_page(
+            self.session,
+            self.config.page_url,
+            params={"page": f"page-{page}"},
+            cache=self.config.cache,
+            offline=self.config.offline,
+            policy=self.config.http_policy,
+        )
+        if page_html is None:
+            logger.error(f"Пропускаем страницу {page}, так как HTML не был загружен")
+            if self.known_dates is not None:
+                self.stop_pages.set()
+            return []
+        logger.info(f"Страница {page} получена.")
+        return [(page, page_html)]
+
+    async def _extract_links(self, item: tuple[int, str]) -> list[tuple[str, date]]:
+        """Извлекает ссылки на файлы и даты торгов"""
+        page, page_html = item
+        parser = Parser(page_html, self.config.min_year, self.config.current_year)
+        file_links = parser.extract_file_links()
+        if self.known_dates is not None:
+            file_links = [(link, bidding_date) for link, bidding_date in file_links if bidding_date not in self.known_dates]
+            if not file_links:
+                logger.info(f"Все даты на странице {page} уже загружены")
+                self.stop_pages.set()
+        return [(self.config.base_url + link, bidding_date) for link, bidding_date in file_links]
+
+    async def _download(self, item: tuple[str, date]) -> list[tuple[BinaryIO, date]]:
+        """Скачивает xls-файл"""
+        url, bidding_date = item
+        file = await fetch_file(
+            self.session,
+            url,
+            cache=self.config.cache,
+            offline=self.config.offline,
+            policy=self.config.http_policy,
+            spool_max_size=self.config.spool_max_size,
+        )
+        if file is None:
+            return []
+        return [(file, bidding_date)]
+
+    async def _parse(self, item: tuple[BinaryIO, date]) -> list[tuple[list[dict], date]]:
+        """Разбирает xls-файл в пуле процессов, не блокируя цикл событий"""
+        file, bidding_date = item
+        loop = asyncio.get_running_loop()
+        with file:  # Файл открыт до конца разбора: временный файл удаляется при закрытии
+            # Временный файл процесс пула откроет сам по пути. Файл из кэша передается
+            # содержимым: пока бюллетень ждет в очереди, кэш может удалить его при вытеснении
+            source = spool_path(file) or file.read()
+            try:
+                data, parse_seconds = await loop.run_in_executor(self.executor, timed_parse_xls, source, bidding_date)
+            except XLSExtractorError as e:
+                logger.error(e)
+                return []
+        xls_parse_seconds.observe(parse_seconds)
+        rows_per_file.observe(len(data))
+        logger.info(f"Данные готовы к загрузке в БД для даты {bidding_date}")
+        return [(data, bidding_date)]
+
+    async def _write(self, item: tuple[list[dict], date]) -> list[Any]:
+        """Сохраняет данные в БД"""
+        data, bidding_date = item
+        try:
+            result = await self.loader(data)
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при сохранении данных б БД: {e}")
+            return []
+        logger.info(
+            f"Данные загружены в БД с торгами {bidding_date}: добавлено {result.inserted}, обновлено {result.updated}"
+        )
+        self.rows_written += result.inserted + result.updated
+        if result.inserted or result.updated:
+            self.loaded_dates.add(bidding_date)
+        return []
@@ -1,29 +1,215 @@
+import asyncio
 import io
+import os
+import tempfile
+import time
+from functools import wraps
+from typing import Awaitable, BinaryIO, Callable, TypeVar
 
 import aiohttp
+from yarl import URL
 
 from app.configs.logging_config import logger
+from parsers.cache import CacheEntry, FileCache
+from parsers.http_policy import HttpPolicy
+from utils.metrics import Histogram
 
+T = TypeVar("T")
 
-async def fetch_page(session: aiohttp.ClientSession, url: str, params=None) -> str | None:
+default_policy = HttpPolicy()
+
+CHUNK_SIZE = 64 * 1024  # Размер блока при потоковом скачивании файла
+SPOOL_MAX_SIZE = 1024 * 1024  # Порог, после которого файл сбрасывается из памяти на диск
+SPOOL_PREFIX = "spimex-"  # Префикс временных файлов со скачанными бюллетенями
+
+BodyReader = Callable[[aiohttp.ClientResponse], Awaitable[BinaryIO]]
+
+fetch_seconds = Histogram(
+    "spimex_fetch_seconds",
+    "Время загрузки страницы или файла целиком: с повторами, ожиданием лимита и проверкой кэша "
+    "(kind: page, file; result: ok, error)",
+)
+
+
+def _measured(kind: str) -> Callable[[Callable[..., Awaitable[T | None]]], Callable[..., Awaitable[T | None]]]:
+    """Декоратор: замеряет время загрузки; None в ответе, исключение и отмена считаются ошибкой"""
+
+    def decorator(func: Callable[..., Awaitable[T | None]]) -> Callable[..., Awaitable[T | None]]:
+        @wraps(func)
+        async def wrapper(*args, **kwargs) -> T | None:
+            start = time.perf_counter()
+            result = None
+            try:
+                result = await func(*args, **kwargs)
+                return result
+            finally:
+                fetch_seconds.observe(
+                    time.perf_counter() - start, kind=kind, result="error" if result is None else "ok"
+                )
+
+        return wrapper
+
+    return decorator
+
+
+async def _read_to_memory(response: aiohttp.ClientResponse) -> BinaryIO:
+    """Читает тело ответа целиком в память"""
+    return io.BytesIO(await response.read())
+
+
+def _rollover(buffer: io.BytesIO) -> BinaryIO:
+    """Переносит содержимое буфера в именованный временный файл, который удаляется при закрытии"""
+    file = tempfile.NamedTemporaryFile(prefix=SPOOL_PREFIX)
+    try:
+        with buffer.getbuffer() as view:
+            file.write(view)
+    except BaseException:
+        file.close()
+        raise
+    buffer.close()
+    return file
+
+
+def spool_path(file: BinaryIO) -> str | None:
+    """
+    Путь временного файла, в который `_spooling_reader` перенес тело ответа.
+
+    Такой файл принадлежит только вызывающему коду и удаляется при закрытии,
+    поэтому его можно открыть по пути в другом процессе, пока он открыт здесь.
+    У остальных файлов (в том числе записей `FileCache`, которые кэш может
+    удалить при вытеснении) возвращается None.
+    """
+    name = getattr(file, "name", None)
+    if not isinstance(name, str):
+        return None
+    directory, filename = os.path.split(name)
+    if directory != tempfile.gettempdir() or not filename.startswith(SPOOL_PREFIX):
+        return None
+    return name
+
+
+def _spooling_reader(spool_max_size: int) -> BodyReader:
+    """
+    Создает функцию потокового чтения тела ответа.
+
+    Тело держится в памяти, пока не превысит `spool_max_size` байт, затем
+    переносится в именованный временный файл: по его пути файл можно открыть
+    в другом процессе, не передавая содержимое.
+    """
+
+    async def read(response: aiohttp.ClientResponse) -> BinaryIO:
+        file: BinaryIO = io.BytesIO()
+        try:
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                if isinstance(file, io.BytesIO) and file.tell() + len(chunk) > spool_max_size:
+                    file = _rollover(file)
+                file.write(chunk)
+        except BaseException:
+            file.close()
+            raise
+        file.seek(0)
+        return file
+
+    return read
+
+
+async def _fetch_cached(
+    session: aiohttp.ClientSession,
+    url: str,
+    read_body: BodyReader,
+    params=None,
+    cache: FileCache | None = None,
+    offline: bool = False,
+    policy: HttpPolicy | None = None,
+) -> tuple[BinaryIO, CacheEntry] | None:
+    """
+    Запрашивает ресурс с учетом дискового кэша и политики повторов.
+
+    Если запись есть в кэше, запрос отправляется условным и при ответе 304
+    возвращается закэшированное содержимое. В режиме offline сеть не используется.
+    """
+    cache_key = str(URL(url).update_query(params)) if params else url
+    cached = cache.get(cache_key) if cache is not None else None
+    if offline:
+        if cached is None:
+            logger.error(f"{cache_key} отсутствует в кэше, режим offline")
+            return None
+        return cached.open(), cached
+
+    async def handle(response: aiohttp.ClientResponse) -> tuple[BinaryIO, CacheEntry]:
+        if response.status == 304 and cached is not None:
+            logger.info(f"{cache_key} не изменился, используем кэш")
+            return cached.open(), cached
+        response.raise_for_status()
+        body = await read_body(response)
+        try:
+            entry = CacheEntry(
+                url=cache_key,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                encoding=response.charset,  # Только из заголовка: тело файла читается потоком
+            )
+            if cache is not None:
+                cache.store(entry, body)
+        except BaseException:
+            body.close()
+            raise
+        return body, entry
+
+    headers = cached.conditional_headers() if cached is not None else None
+    return await (policy or default_policy).get(session, url, handle, params=params, headers=headers)
+
+
+@_measured("page")
+async def fetch_page(
+    session: aiohttp.ClientSession,
+    url: str,
+    params=None,
+    cache: FileCache | None = None,
+    offline: bool = False,
+    policy: HttpPolicy | None = None,
+) -> str | None:
     """Запрашиваем страницу и отдаем html-страницу"""
     try:
-        async with session.get(url, params=params) as response:
-            response.raise_for_status()
-            logger.info(f"Страница {response.url} загружена")
-            return await response.text()
+        result = await _fetch_cached(session, url, _read_to_memory, params, cache, offline, policy)
+        if result is None:
+            return None
+        body, entry = result
+        with body:
+            logger.info(f"Страница {entry.url} загружена")
+            return body.read().decode(entry.encoding or "utf-8")
     except aiohttp.ClientResponseError as e:
         logger.error(f"Ошибка при получении страницы {params['page']}: {e.status}")
         return None
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Ошибка соединения при получении страницы {params['page']}: {e!r}")
+        return None
 
 
-async def fetch_file(session: aiohttp.ClientSession, url: str) -> io.BytesIO | None:
-    """Скачиваем файл и отдаем контент байтов"""
+@_measured("file")
+async def fetch_file(
+    session: aiohttp.ClientSession,
+    url: str,
+    cache: FileCache | None = None,
+    offline: bool = False,
+    policy: HttpPolicy | None = None,
+    spool_max_size: int = SPOOL_MAX_SIZE,
+) -> BinaryIO | None:
+    """
+    Скачиваем файл потоково и отдаем открытый файловый объект.
+
+    Содержимое до `spool_max_size` байт держится в памяти (BytesIO), больше - во
+    временном файле на диске, у которого есть путь (`name`). Закрыть файл должен
+    вызывающий код.
+    """
     try:
-        async with session.get(url, raise_for_status=True) as response:
-            response.raise_for_status()
-            logger.info(f"Файл {url} загружен на диск")
-            return io.BytesIO(await response.read())
-    except aiohttp.ClientResponseError as e:
-        logger.error(f"Ошибка при скачивание страницы файла: {e}")
+        result = await _fetch_cached(
+            session, url, _spooling_reader(spool_max_size), cache=cache, offline=offline, policy=policy
+        )
+        if result is None:
+            return None
+        logger.info(f"Файл {url} загружен на диск")
+        return result[0]
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Ошибка при скачивание страницы файла: {e!r}")
         return None
@@ -1,18 +1,49 @@
 from datetime import date
+from typing import Any, Callable, ClassVar, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
+from utils.pagination import (
+    decode_aggregate_cursor,
+    decode_cursor,
+    decode_date_cursor,
+    decode_date_id_cursor,
+)
 
-class LimitOffset(BaseModel):
+MAX_LIMIT = 1000  # Наибольшее количество элементов на странице
+
+
+class CursorParams(BaseModel):
     """
-    Модель для пагинации с параметрами `offset` и `limit`.
+    Модель для курсорной пагинации.
 
-    :param offset: Смещение для запроса, по умолчанию 0.
-    :param limit: Количество элементов на странице, по умолчанию 10.
+    :param limit: Количество элементов на странице, по умолчанию 10, не больше `MAX_LIMIT`.
+    :param cursor: Курсор `next_cursor` из предыдущего ответа; без него выдается первая страница.
     """
 
-    offset: int = 0
-    limit: int = 10
+    limit: int = Field(10, ge=1, le=MAX_LIMIT)
+    cursor: str | None = None
+
+    cursor_decoder: ClassVar[Callable[[str], Any]] = staticmethod(decode_cursor)
+
+    @field_validator("cursor")
+    @classmethod
+    def validate_cursor(cls, cursor: str | None) -> str | None:
+        if cursor is not None:
+            cls.cursor_decoder(cursor)
+        return cursor
+
+
+class LimitOffset(CursorParams):
+    """
+    Модель для пагинации с параметрами `offset`, `limit` и `cursor`.
+
+    :param offset: Смещение для запроса, по умолчанию 0. Игнорируется, если передан `cursor`.
+    """
+
+    offset: int = Field(0, ge=0)
+
+    cursor_decoder: ClassVar[Callable[[str], Any]] = staticmethod(decode_date_cursor)
 
 
 class TradingParams(BaseModel):
@@ -29,9 +60,9 @@ class TradingParams(BaseModel):
     delivery_basis_id: str | None = Field(None, min_length=3, max_length=3)
 
 
-class DynamicParams(TradingParams):
+class PeriodParams(TradingParams):
     """
-    Расширенная модель фильтрации с дополнительными параметрами дат.
+    Модель фильтрации по торговым параметрам и диапазону дат.
 
     :param start_date: Начальная дата диапазона.
     :param end_date: Конечная дата диапазона.
@@ -41,10 +72,43 @@ class DynamicParams(TradingParams):
     end_date: date | None = None
 
 
+class DynamicParams(PeriodParams, CursorParams):
+    """
+    Расширенная модель фильтрации с дополнительными параметрами дат
+    и курсорной пагинацией.
+    """
+
+    cursor_decoder: ClassVar[Callable[[str], Any]] = staticmethod(decode_date_id_cursor)
+
+
 class LastParams(TradingParams, LimitOffset):
     """
     Модель для получения последних записей с фильтрацией по торговым параметрам
     и поддержкой пагинации.
     """
 
-    pass
+    cursor_decoder: ClassVar[Callable[[str], Any]] = staticmethod(decode_date_id_cursor)
+
+
+class AggregateParams(DynamicParams):
+    """
+    Модель параметров агрегации торгов по периодам.
+
+    :param period: Размер периода группировки: день, неделя или месяц.
+    :param limit: Количество групп на странице, по умолчанию 100, не больше `MAX_LIMIT`.
+    """
+
+    period: Literal["day", "week", "month"] = "day"
+    limit: int = Field(100, ge=1, le=MAX_LIMIT)
+
+    cursor_decoder: ClassVar[Callable[[str], Any]] = staticmethod(decode_aggregate_cursor)
+
+
+class ExportParams(PeriodParams):
+    """
+    Модель параметров выгрузки торгов за период.
+
+    :param format: Формат выгрузки: NDJSON (по строке JSON на запись) или CSV.
+    """
+
+    format: Literal["ndjson", "csv"] = "ndjson"
@@ -1,7 +1,7 @@
 from datetime import date
 from decimal import Decimal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class TradingLastDays(BaseModel):
@@ -9,9 +9,11 @@ class TradingLastDays(BaseModel):
     Модель для хранения списка последних торговых дней.
 
     :param dates: Список дат последних торгов.
+    :param next_cursor: Курсор следующей страницы или None, если страница последняя.
     """
 
     dates: list[date]
+    next_cursor: str | None = None
 
 
 class Trading(BaseModel):
@@ -31,6 +33,8 @@ class Trading(BaseModel):
     :param date: Дата проведения торгов.
     """
 
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     exchange_product_id: str
     exchange_product_name: str
@@ -42,3 +46,53 @@ class Trading(BaseModel):
     total: Decimal
     count: int
     date: date
+
+
+class TradingPage(BaseModel):
+    """
+    Страница торговых данных для курсорной пагинации.
+
+    :param items: Записи страницы.
+    :param next_cursor: Курсор следующей страницы или None, если страница последняя.
+    """
+
+    items: list[Trading]
+    next_cursor: str | None = None
+
+
+class TradingAggregate(BaseModel):
+    """
+    Агрегированные торговые данные за период.
+
+    :param period_start: Первый день периода (день, понедельник недели или первое число месяца).
+    :param oil_id: Идентификатор нефтепродукта.
+    :param delivery_basis_id: Идентификатор базы доставки.
+    :param delivery_type_id: Идентификатор типа доставки.
+    :param volume: Суммарный объем торгов.
+    :param total: Суммарная стоимость сделок.
+    :param count: Суммарное количество сделок.
+    :param vwap: Средневзвешенная по объему цена (total / volume).
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    period_start: date
+    oil_id: str
+    delivery_basis_id: str
+    delivery_type_id: str
+    volume: int
+    total: Decimal
+    count: int
+    vwap: Decimal | None
+
+
+class TradingAggregatePage(BaseModel):
+    """
+    Страница агрегированных торговых данных.
+
+    :param items: Группы страницы.
+    :param next_cursor: Курсор следующей страницы или None, если страница последняя.
+    """
+
+    items: list[TradingAggregate]
+    next_cursor: str | None = None
@@ -1,12 +1,21 @@
-from datetime import date
-from typing import Any
+from typing import Any, AsyncIterator, Sequence
 
-from fastapi_cache.decorator import cache
-from sqlalchemy import insert, select
+from sqlalchemy import cast, ColumnElement, Date, func, Row, Select, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.models import SpimexTradingResults
-from utils.redis_client import get_expiries
+from database.crud import refresh_trading_days, upsert_trades, UpsertResult
+from database.models import SpimexTradingResults, TradingDay
+from schemas.tradings import Trading, TradingAggregatePage, TradingLastDays, TradingPage
+from utils.cache import cached
+from utils.pagination import (
+    decode_aggregate_cursor,
+    decode_date_cursor,
+    decode_date_id_cursor,
+    encode_cursor,
+)
+
+EXPORT_BATCH_SIZE = 5000  # Строк за одну выборку из серверного курсора при выгрузке
+TRADING_COLUMNS = tuple(Trading.model_fields)  # Колонки, выбираемые для ответов API и выгрузки
 
 
 class TradingService:
@@ -18,59 +27,204 @@ class TradingService:
         """
         Инициализирует сервис с асинхронной сессией базы данных.
 
+        Сервис не открывает и не закрывает сессию: ее жизненным циклом
+        управляет вызывающий код (зависимость FastAPI на время запроса).
+
         :param session: Асинхронная сессия SQLAlchemy.
         """
         self.session = session
         self.model = SpimexTradingResults
 
-    @cache(expire=get_expiries())
-    async def get_last_dates(self, offset: int = 0, limit: int = 10) -> list[date]:
+    @cached("trading:last_dates")
+    async def get_last_dates(self, offset: int = 0, limit: int = 10, cursor: str | None = None) -> TradingLastDays:
         """
         Получает последние доступные даты торгов.
 
-        :param offset: Смещение в выборке (по умолчанию 0).
+        Даты читаются из таблицы `TradingDay` (одна строка на день) по первичному
+        ключу, а не через DISTINCT по всей таблице результатов.
+
+        :param offset: Смещение в выборке (по умолчанию 0), игнорируется при переданном `cursor`.
         :param limit: Количество записей в выборке (по умолчанию 10).
-        :return: Список последних дат торгов.
+        :param cursor: Курсор следующей страницы из предыдущего ответа.
+        :return: Последние даты торгов и курсор следующей страницы.
         """
-        async with self.session as session:
-            stmt = select(self.model.date).distinct().order_by(self.model.date.desc()).offset(offset).limit(limit)
-            results = await session.scalars(stmt)
-            return results.all()
+        stmt = select(TradingDay.date).order_by(TradingDay.date.desc())
+        if cursor:
+            stmt = stmt.where(TradingDay.date < decode_date_cursor(cursor))
+        elif offset:
+            stmt = stmt.offset(offset)
+        results = (await self.session.scalars(stmt.limit(limit + 1))).all()
+        next_cursor = encode_cursor(results[limit - 1]) if len(results) > limit else None
+        return TradingLastDays(dates=results[:limit], next_cursor=next_cursor)
 
-    @cache(expire=get_expiries())
-    async def filter(self, **filters: dict[str, Any]) -> list[SpimexTradingResults]:
+    def _filter_conditions(self, filters: dict[str, Any]) -> list[ColumnElement[bool]]:
         """
-        Фильтрует торговые результаты на основе переданных параметров.
+        Условия фильтрации по торговым параметрам и диапазону дат.
+
+        :param filters: Словарь с фильтрами (oil_id, delivery_type_id, delivery_basis_id, start_date, end_date).
+        :return: Список условий для WHERE.
+        """
+        conditions = []
+        if oil_id := filters.get("oil_id"):
+            conditions.append(self.model.oil_id == oil_id)
+        if delivery_type_id := filters.get("delivery_type_id"):
+            conditions.append(self.model.delivery_type_id == delivery_type_id)
+        if delivery_basis_id := filters.get("delivery_basis_id"):
+            conditions.append(self.model.delivery_basis_id == delivery_basis_id)
+        if start_date := filters.get("start_date"):
+            conditions.append(self.model.date >= start_date)
+        if end_date := filters.get("end_date"):
+            conditions.append(self.model.date <= end_date)
+        return conditions
+
+    def columns_query(self) -> Select:
+        """Выборка колонок `TRADING_COLUMNS` без загрузки ORM-объектов"""
+        return select(*(getattr(self.model, column) for column in TRADING_COLUMNS))
+
+    @staticmethod
+    def to_trading(row: Row) -> Trading:
+        """
+        Преобразует строку `columns_query` в `Trading` без повторной валидации:
+        типы колонок уже соответствуют полям схемы.
+        """
+        return Trading.model_construct(**dict(zip(TRADING_COLUMNS, row)))
+
+    def filter_query(self, **filters: Any) -> Select:
+        """
+        Строит запрос фильтрации торговых результатов.
+
+        Выбираются только колонки `TRADING_COLUMNS` в виде строк Core.
+        Записи упорядочены по (date, id) от новых к старым; следующая страница
+        выбирается по курсору (keyset), без сканирования пропущенных строк.
+        Запрос выбирает на одну запись больше `limit`, чтобы определить,
+        есть ли следующая страница.
 
         :param filters: Словарь с фильтрами (
-            oil_id, delivery_type_id, delivery_basis_id, start_date, end_date, limit, offset
+            oil_id, delivery_type_id, delivery_basis_id, start_date, end_date, limit, offset, cursor
         ).
-        :return: Список отфильтрованных записей.
+        :return: Запрос SQLAlchemy.
+        """
+        stmt = self.columns_query().where(*self._filter_conditions(filters))
+
+        if cursor := filters.get("cursor"):
+            stmt = stmt.where(tuple_(self.model.date, self.model.id) < tuple_(*decode_date_id_cursor(cursor)))
+        elif offset := filters.get("offset", 0):
+            stmt = stmt.offset(offset)
+        return stmt.order_by(self.model.date.desc(), self.model.id.desc()).limit(filters.get("limit", 10) + 1)
+
+    def aggregate_query(self, **filters: Any) -> Select:
         """
-        async with self.session as session:
-            stmt = select(self.model)
+        Строит запрос агрегации торговых результатов по периодам.
+
+        Результаты группируются по началу периода (`date_trunc`), нефтепродукту,
+        базису и типу поставки; для каждой группы считаются суммы объема,
+        стоимости и количества сделок и VWAP (total / volume). Группы упорядочены
+        от новых к старым, следующая страница выбирается по курсору из ключа группы.
+
+        :param filters: Словарь с фильтрами (см. `filter_query`) и размером периода `period`.
+        :return: Запрос SQLAlchemy.
+        """
+        period = filters.get("period", "day")
+        period_start = (
+            self.model.date if period == "day" else cast(func.date_trunc(period, self.model.date), Date)
+        ).label("period_start")
+        keys = (period_start, self.model.oil_id, self.model.delivery_basis_id, self.model.delivery_type_id)
+        volume = func.sum(self.model.volume)
+        total = func.sum(self.model.total)
+        groups = (
+            select(
+                *keys,
+                volume.label("volume"),
+                total.label("total"),
+                func.sum(self.model.count).label("count"),
+                func.round(total / func.nullif(volume, 0), 2).label("vwap"),
+            )
+            .where(*self._filter_conditions(filters))
+            .group_by(*keys)
+            .subquery()
+        )
+
+        group_key = (groups.c.period_start, groups.c.oil_id, groups.c.delivery_basis_id, groups.c.delivery_type_id)
+        stmt = select(groups)
+        if cursor := filters.get("cursor"):
+            stmt = stmt.where(tuple_(*group_key) < tuple_(*decode_aggregate_cursor(cursor)))
+        return stmt.order_by(*(column.desc() for column in group_key)).limit(filters.get("limit", 100) + 1)
 
-            if oil_id := filters.get("oil_id"):
-                stmt = stmt.where(self.model.oil_id == oil_id)
-            if delivery_type_id := filters.get("delivery_type_id"):
-                stmt = stmt.where(self.model.delivery_type_id == delivery_type_id)
-            if delivery_basis_id := filters.get("delivery_basis_id"):
-                stmt = stmt.where(self.model.delivery_basis_id == delivery_basis_id)
-            if start_date := filters.get("start_date"):
-                stmt = stmt.where(self.model.date >= start_date)
-            if end_date := filters.get("end_date"):
-                stmt = stmt.where(self.model.date <= end_date)
+    def export_query(self, **filters: Any) -> Select:
+        """
+        Строит запрос выгрузки торговых результатов за период.
+
+        Порядок записей тот же, что и у `filter_query`.
+
+        :param filters: Словарь с фильтрами (oil_id, delivery_type_id, delivery_basis_id, start_date, end_date).
+        :return: Запрос SQLAlchemy.
+        """
+        return (
+            self.columns_query()
+            .where(*self._filter_conditions(filters))
+            .order_by(self.model.date.desc(), self.model.id.desc())
+        )
+
+    async def stream_export(self, **filters: Any) -> AsyncIterator[Sequence[Row]]:
+        """
+        Потоково читает результаты выгрузки через серверный курсор.
+
+        Сессия должна оставаться открытой, пока итератор не исчерпан.
+
+        :param filters: Словарь с фильтрами (см. `export_query`).
+        :return: Асинхронный итератор пачек строк по `EXPORT_BATCH_SIZE`.
+        """
+        stmt = self.export_query(**filters).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        result = await self.session.stream(stmt)
+        async for partition in result.partitions():
+            yield partition
+
+    @cached("trading:filter", date_range=("start_date", "end_date"))
+    async def filter(self, **filters: dict[str, Any]) -> TradingPage:
+        """
+        Фильтрует торговые результаты на основе переданных параметров.
+
+        :param filters: Словарь с фильтрами (см. `filter_query`).
+        :return: Страница отфильтрованных записей и курсор следующей страницы.
+        """
+        limit = filters.get("limit", 10)
+        results = (await self.session.execute(self.filter_query(**filters))).all()
+
+        next_cursor = None
+        if len(results) > limit:
+            last = results[limit - 1]
+            next_cursor = encode_cursor(last.date, last.id)
+        return TradingPage.model_construct(
+            items=[self.to_trading(row) for row in results[:limit]], next_cursor=next_cursor
+        )
+
+    @cached("trading:aggregate", date_range=("start_date", "end_date"))
+    async def aggregate(self, **filters: Any) -> TradingAggregatePage:
+        """
+        Агрегирует торговые результаты по периодам на стороне БД.
+
+        :param filters: Словарь с фильтрами (см. `aggregate_query`).
+        :return: Страница агрегатов и курсор следующей страницы.
+        """
+        limit = filters.get("limit", 100)
+        results = (await self.session.execute(self.aggregate_query(**filters))).all()
 
-            limit = filters.get("limit", 10)
-            offset = filters.get("offset", 0)
-            results = await session.scalars(stmt.limit(limit).offset(offset))
-            return results.all()
+        next_cursor = None
+        if len(results) > limit:
+            last = results[limit - 1]
+            next_cursor = encode_cursor(last.period_start, last.oil_id, last.delivery_basis_id, last.delivery_type_id)
+        return TradingAggregatePage.model_validate(
+            {"items": results[:limit], "next_cursor": next_cursor}, from_attributes=True
+        )
 
-    async def mass_create_trading(self, data: list[dict]) -> None:
+    async def mass_create_trading(self, data: list[dict]) -> UpsertResult:
         """
-        Массово создает записи в таблице торговых результатов.
+        Массово создает или обновляет записи в таблице торговых результатов.
 
         :param data: Список словарей с данными для вставки.
+        :return: Количество вставленных и обновленных строк.
         """
-        async with self.session as session:
-            await session.execute(insert(SpimexTradingResults), data)
+        result = await upsert_trades(self.session, data)
+        await refresh_trading_days(self.session, {row["date"] for row in data})
+        await self.session.commit()
+        return result
@@ -0,0 +1,310 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+from typing import Any, Awaitable, Callable, get_type_hints, Iterable, TypeVar
+
+from fastapi_cache import FastAPICache
+from pydantic import TypeAdapter
+from redis.asyncio import Redis
+
+from app.configs.logging_config import logger
+from configs.config import settings
+from database.database import read_session
+from utils.metrics import Counter, Gauge
+from utils.redis_client import (
+    DATE_GENERATIONS_KEY,
+    EVENTS_CHANNEL,
+    GENERATION_KEY,
+    get_expiries,
+)
+
+T = TypeVar("T")
+
+RESUBSCRIBE_MAX_DELAY = 30.0  # Максимальная задержка перед повторной подпиской на события, сек.
+
+cache_requests = Counter(
+    "api_cache_requests", "Обращения к кэшу ответов API по уровню (l1, l2) и результату (hit, miss, coalesced, error)"
+)
+cache_generation = Gauge("api_cache_generation", "Последнее поколение данных (номер последней загрузки торгов)")
+cache_l1_entries = Gauge("api_cache_l1_entries", "Записей в кэше первого уровня (в памяти процесса)")
+
+
+class LRUCache:
+    """
+    Кэш первого уровня в памяти процесса: ограниченный по числу записей LRU
+    со временем жизни записей. Хранит готовые объекты, без сериализации.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any | None:
+        """Возвращает значение и отмечает запись как недавно использованную; None, если записи нет или она истекла"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Сохраняет значение и вытесняет давно не использованные записи сверх лимита"""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+l1_cache = LRUCache(settings.CACHE_L1_MAX_ENTRIES, settings.CACHE_L1_TTL)
+cache_l1_entries.set_function(lambda: len(l1_cache))
+_in_flight: dict[str, asyncio.Task] = {}
+
+
+class CacheGeneration:
+    """
+    Поколения данных по датам торгов, входящие в ключи кэша.
+
+    После загрузки торгов парсер увеличивает счетчик в Redis, записывает его
+    значение для каждой затронутой даты и публикует событие; `watch` обновляет
+    эти значения в процессе. В ключ запроса входит наибольшее поколение среди
+    дат его диапазона, поэтому загрузка за одни даты переводит на новые ключи
+    только запросы, диапазон которых эти даты включает. Диапазон без границы
+    включает и будущие даты: такие запросы (последние торги, список дат)
+    получают новый ключ при каждой загрузке новой даты. Старые записи истекают по TTL.
+
+    Даты хранятся строками ISO-формата: так они приходят в событиях и из Redis,
+    а их лексикографический порядок совпадает с хронологическим.
+    """
+
+    def __init__(self):
+        self.value = 0  # Последнее поколение
+        self._dates: list[str] = []  # Даты с изменениями по возрастанию
+        self._generations: dict[str, int] = {}  # Поколение последнего изменения даты
+        self._prefix_max: list[int] = []  # Наибольшее поколение среди _dates[: i + 1]
+        self._suffix_max: list[int] = []  # Наибольшее поколение среди _dates[i:]
+
+    def load(self, value: int, generations: dict[str, str | int]) -> None:
+        """Заменяет состояние значениями из Redis (счетчик и хэш поколений по датам)"""
+        self._generations = {day: int(day_generation) for day, day_generation in generations.items()}
+        self._dates = sorted(self._generations)
+        self._set(value)
+
+    def update(self, value: int, dates: Iterable[str]) -> None:
+        """Применяет событие загрузки: даты `dates` изменены в поколении `value`"""
+        for day in dates:
+            if day not in self._generations:
+                insort(self._dates, day)
+            self._generations[day] = value
+        self._set(max(value, self.value))
+
+    def _set(self, value: int) -> None:
+        if value != self.value:
+            logger.info(f"Поколение данных кэша: {self.value} -> {value}")
+        self.value = value
+        cache_generation.set(value)
+        # События редки, а ключ строится на каждый запрос: максимумы для открытых диапазонов считаются заранее
+        prefix, suffix, current = [], [], 0
+        for day in self._dates:
+            current = max(current, self._generations[day])
+            prefix.append(current)
+        current = 0
+        for day in reversed(self._dates):
+            current = max(current, self._generations[day])
+            suffix.append(current)
+        self._prefix_max, self._suffix_max = prefix, suffix[::-1]
+
+    def for_range(self, start: str | None = None, end: str | None = None) -> int:
+        """
+        Поколение данных диапазона дат.
+
+        :param start: Первая дата диапазона (ISO-формат); None - без ограничения.
+        :param end: Последняя дата диапазона (ISO-формат); None - без ограничения.
+        :return: Наибольшее поколение среди дат диапазона; 0, если они не менялись.
+        """
+        low = bisect_left(self._dates, start) if start is not None else 0
+        high = bisect_right(self._dates, end) if end is not None else len(self._dates)
+        if low >= high:
+            return 0
+        if low == 0:
+            return self._prefix_max[high - 1]
+        if high == len(self._dates):
+            return self._suffix_max[low]
+        return max(self._generations[day] for day in self._dates[low:high])
+
+    async def watch(self, redis: Redis) -> None:
+        """
+        Подписывается на события загрузки торгов и обновляет поколение.
+
+        Текущее значение счетчика читается после подписки, поэтому событие,
+        опубликованное во время (пере)подключения, не теряется. При ошибках
+        Redis подписка повторяется с экспоненциальной задержкой.
+        """
+        delay = 1.0
+        while True:
+            try:
+                async with redis.pubsub() as pubsub:
+                    await pubsub.subscribe(EVENTS_CHANNEL)
+                    self.load(int(await redis.get(GENERATION_KEY) or 0), await redis.hgetall(DATE_GENERATIONS_KEY))
+                    delay = 1.0
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            event = json.loads(message["data"])
+                            logger.info(f"Загружены торги за {', '.join(event['dates'])}")
+                            self.update(int(event["generation"]), event["dates"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Подписка на события кэша прервана: {e!r}, повтор через {delay:.0f} с")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RESUBSCRIBE_MAX_DELAY)
+
+
+generation = CacheGeneration()
+
+
+def _normalize(arguments: dict[str, Any]) -> dict[str, Any]:
+    """
+    Приводит аргументы вызова к каноническому виду для ключа кэша.
+
+    Аргументы `**kwargs` раскрываются, значения None отбрасываются,
+    даты приводятся к ISO-формату.
+    """
+    normalized = {}
+    for name, value in arguments.items():
+        if isinstance(value, dict):
+            normalized.update(_normalize(value))
+        elif value is not None:
+            normalized[name] = value.isoformat() if isinstance(value, date) else value
+    return normalized
+
+
+def build_key(namespace: str, arguments: dict[str, Any], date_range: tuple[str, str] | None = None) -> str:
+    """
+    Строит ключ кэша из пространства имен и нормализованных параметров.
+
+    :param namespace: Пространство имен (имя кэшируемого метода).
+    :param arguments: Аргументы вызова без `self`.
+    :param date_range: Имена параметров с первой и последней датой выборки;
+        None - результат зависит от всех дат.
+    :return: Ключ вида `<prefix>:<namespace>:g<поколение дат выборки>:<sha1 параметров>`.
+    """
+    normalized = _normalize(arguments)
+    start, end = (normalized.get(name) for name in date_range) if date_range else (None, None)
+    payload = json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+    digest = hashlib.sha1(payload.encode()).hexdigest()
+    return f"{FastAPICache.get_prefix()}:{namespace}:g{generation.for_range(start, end)}:{digest}"
+
+
+async def _call_with_own_session(func: Callable[..., Awaitable[T]], args: Any, kwargs: Any) -> T:
+    """
+    Вызывает метод на новом экземпляре сервиса с собственной сессией чтения.
+
+    Загрузку ждут несколько запросов, и она продолжается после отмены первого
+    из них, поэтому сессия запроса, начавшего загрузку, для нее не подходит:
+    по завершении запроса зависимость ее закрывает. Сессия запроса, которую
+    метод так и не использовал, соединение не занимает (см. `ReadSession`),
+    поэтому промах кэша берет из пула одно соединение.
+    """
+    service, *rest = args
+    async with read_session() as session:
+        return await func(type(service)(session), *rest, **kwargs)
+
+
+async def _load(
+    namespace: str, key: str, adapter: TypeAdapter, func: Callable[..., Awaitable[T]], args: Any, kwargs: Any
+) -> T:
+    """Читает значение из Redis (второй уровень), при промахе вызывает метод и сохраняет результат"""
+    backend = FastAPICache.get_backend()
+    try:
+        cached_value = await backend.get(key)
+    except Exception as e:
+        logger.warning(f"Ошибка чтения кэша {key}: {e!r}")
+        cache_requests.inc(namespace=namespace, tier="l2", result="error")
+        return await _call_with_own_session(func, args, kwargs)
+    if cached_value is not None:
+        cache_requests.inc(namespace=namespace, tier="l2", result="hit")
+        return adapter.validate_json(cached_value)
+
+    cache_requests.inc(namespace=namespace, tier="l2", result="miss")
+    result = await _call_with_own_session(func, args, kwargs)
+    try:
+        await backend.set(key, adapter.dump_json(result), expire=get_expiries())
+    except Exception as e:
+        logger.warning(f"Ошибка записи в кэш {key}: {e!r}")
+    return result
+
+
+def cached(
+    namespace: str, date_range: tuple[str, str] | None = None
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """
+    Двухуровневый кэш результатов методов сервиса.
+
+    Первый уровень - `l1_cache` в памяти процесса, второй - бэкенд FastAPICache
+    (Redis) с теми же ключами. Ключ строится только из параметров вызова
+    (экземпляр сервиса с сессией в ключ не входит) и поколения данных за даты выборки.
+    Одновременные промахи по одному ключу объединяются: Redis и БД опрашивает
+    одна загрузка, все запросы ждут ее результат. Загрузка выполняется на
+    новом экземпляре сервиса (`type(self)(session)`) с собственной сессией
+    чтения, а не на сессии запроса, который ее начал. Время жизни записи в
+    Redis считается при каждом сохранении со случайным разбросом, результат
+    сериализуется по аннотации возвращаемого типа. При недоступности Redis
+    метод выполняется без второго уровня.
+
+    :param namespace: Пространство имен ключей и метка метрик.
+    :param date_range: Имена параметров метода с первой и последней датой выборки.
+        Без них ключ меняется после загрузки торгов за любую дату.
+    """
+
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        signature = inspect.signature(func)
+        adapter = TypeAdapter(get_type_hints(func)["return"])
+
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            if not FastAPICache.get_enable():
+                return await func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            arguments.pop("self", None)
+            key = build_key(namespace, arguments, date_range)
+
+            value = l1_cache.get(key)
+            if value is not None:
+                cache_requests.inc(namespace=namespace, tier="l1", result="hit")
+                return value
+
+            task = _in_flight.get(key)
+            if task is not None:
+                cache_requests.inc(namespace=namespace, tier="l1", result="coalesced")
+            else:
+                cache_requests.inc(namespace=namespace, tier="l1", result="miss")
+                # Загрузка идет отдельной задачей: отмена первого запроса не прерывает ожидающих
+                task = asyncio.create_task(_load(namespace, key, adapter, func, args, kwargs))
+                _in_flight[key] = task
+                task.add_done_callback(lambda _: _in_flight.pop(key, None))
+            value = await asyncio.shield(task)
+            l1_cache.set(key, value)
+            return value
+
+        return wrapper
+
+    return decorator
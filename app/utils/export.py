@@ -0,0 +1,42 @@
+import csv
+import io
+import json
+from datetime import date
+from decimal import Decimal
+from typing import Any, Iterable, Sequence
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _json_default(value: Any) -> str:
+    """Сериализация Decimal и дат так же, как в JSON-ответах API (строкой)"""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Тип {type(value).__name__} не сериализуется в JSON")
+
+
+def csv_header(columns: Sequence[str]) -> bytes:
+    """Строка заголовка CSV"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(columns)
+    return buffer.getvalue().encode()
+
+
+def encode_rows(rows: Iterable[Sequence[Any]], columns: Sequence[str], export_format: str) -> bytes:
+    """
+    Кодирует пачку строк результата в один фрагмент ответа.
+
+    :param rows: Строки в порядке `columns`.
+    :param columns: Имена колонок.
+    :param export_format: Формат выгрузки: `ndjson` или `csv`.
+    :return: Закодированный в UTF-8 фрагмент.
+    """
+    if export_format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
+    return "".join(
+        json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=_json_default) + "\n" for row in rows
+    ).encode()
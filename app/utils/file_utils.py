@@ -1,9 +1,12 @@
 import io
+import mmap
+import time
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Any
+from typing import Any, BinaryIO
 
 import pandas as pd
+import xlrd
 
 from exceptions import XLSExtractorError
 from app.configs.logging_config import logger
@@ -14,69 +17,89 @@ class XLSExtractor:
 
     sheet_name: str = "TRADE_SUMMARY"
     table_name = "Единица измерения: Метрическая тонна"
+    header_scan_columns = 5  # Ключевая фраза ищется только в первых колонках листа
+    record_keys = (
+        "exchange_product_id",
+        "exchange_product_name",
+        "oil_id",
+        "delivery_basis_id",
+        "delivery_basis_name",
+        "delivery_type_id",
+        "volume",
+        "total",
+        "count",
+        "date",
+        "created_on",
+        "updated_on",
+    )
 
-    def __init__(self, file: io.BytesIO, bidding_date: date):
+    def __init__(self, file: BinaryIO, bidding_date: date):
         try:
-            if file.getbuffer().nbytes == 0:
+            if file.seek(0, io.SEEK_END) == 0:
                 raise ValueError("Файл пустой, загрузка невозможна!")
             else:
                 self.bidding_date = bidding_date
-                self.dataframe: pd.DataFrame = self._load_xls(file)
-                logger.info(f"Файл преобразован в DataFrame для даты {bidding_date}")
-        except ValueError as e:
+                self.sheet: xlrd.sheet.Sheet = self._load_xls(file)
+                logger.info(f"Лист {self.sheet_name} загружен для даты {bidding_date}")
+        except (ValueError, xlrd.XLRDError) as e:
             raise XLSExtractorError(e) from e
 
-    def _load_xls(self, file) -> pd.DataFrame:
-        """Загружает данные из xls-файла в DataFrame."""
-        return pd.read_excel(file, sheet_name=self.sheet_name, header=None)
+    def _load_xls(self, file: BinaryIO) -> xlrd.sheet.Sheet:
+        """Открывает xls-файл, загружает только нужный лист и освобождает ресурсы книги."""
+        file.seek(0)
+        try:
+            # Файл на диске отображается в память, а не копируется в процесс целиком
+            contents = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:  # В том числе io.UnsupportedOperation у BytesIO
+            contents = file.read()
+        book = xlrd.open_workbook(file_contents=contents, on_demand=True)
+        try:
+            return book.sheet_by_name(self.sheet_name)
+        finally:
+            # Значения ячеек уже в листе; содержимое файла и общие строки книги больше не нужны
+            book.release_resources()
 
     def _find_start_index(self) -> int:
         """Находит индекс строки, содержащей ключевую фразу."""
-        match = self.dataframe.stack().astype(str).str.contains(self.table_name)
-        indices = match[match].index.get_level_values(0).unique()
+        for row_idx in range(self.sheet.nrows):
+            for value in self.sheet.row_values(row_idx, 0, self.header_scan_columns):
+                if isinstance(value, str) and self.table_name in value:
+                    return row_idx
+        raise ValueError(f"Секция '{self.table_name}' не найдена!")
 
-        if indices.empty:
-            raise ValueError(f"Секция '{self.table_name}' не найдена!")
-        return indices[0]
-
-    def _extract_table(self):
-        """Обрезает DataFrame с нужного индекса и переименовывает колонки."""
-        start_idx = self._find_start_index()
-        self.df = self.dataframe.iloc[start_idx + 1 :].reset_index(drop=True)
-        self.df.columns = self.df.iloc[0].astype(str).str.replace("\n", " ").str.strip()
-        return self.df.iloc[1:].reset_index(drop=True)  # Убираем заголовок
+    def _extract_table(self) -> pd.DataFrame:
+        """Строит DataFrame только из строк таблицы, следующих за ключевой фразой."""
+        header_idx = self._find_start_index() + 1
+        columns = [str(value).replace("\n", " ").strip() for value in self.sheet.row_values(header_idx)]
+        rows = [self.sheet.row_values(row_idx) for row_idx in range(header_idx + 1, self.sheet.nrows)]
+        return pd.DataFrame(rows, columns=columns)
 
     def _filter_valid_rows(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Фильтрует строки, оставляя только те, где количество договоров > 0.
         """
         count_col = next(col for col in df.columns if "Количество Договоров" in col)
-        df = df[df[count_col].astype(str).str.isnumeric()]
-        df = df[df[count_col].astype(int) > 0]
+        counts = pd.to_numeric(df[count_col], errors="coerce")
+        df = df[counts > 0]
         return df.iloc[:-2]  # Удаляем последние 2 строки с итогами
 
     def _to_dict(self, df: pd.DataFrame) -> list[dict[str, Any]]:
         """Преобразует отфильтрованные данные в список словарей."""
         current_datetime = datetime.now()
-        records = []
-        for _, row in df.iterrows():
-            records.append(
-                {
-                    "exchange_product_id": row["Код Инструмента"],
-                    "exchange_product_name": row["Наименование Инструмента"],
-                    "oil_id": row["Код Инструмента"][:4],
-                    "delivery_basis_id": row["Код Инструмента"][4:7],
-                    "delivery_basis_name": row["Базис поставки"],
-                    "delivery_type_id": row["Код Инструмента"][-1],
-                    "volume": int(row["Объем Договоров в единицах измерения"]),
-                    "total": Decimal(row["Обьем Договоров, руб."]),
-                    "count": int(row["Количество Договоров, шт."]),
-                    "date": self.bidding_date,
-                    "created_on": current_datetime,
-                    "updated_on": current_datetime,
-                }
-            )
-        return records
+        codes = df["Код Инструмента"].astype(str)
+        columns = (
+            codes.tolist(),
+            df["Наименование Инструмента"].tolist(),
+            codes.str[:4].tolist(),
+            codes.str[4:7].tolist(),
+            df["Базис поставки"].tolist(),
+            codes.str[-1].tolist(),
+            pd.to_numeric(df["Объем Договоров в единицах измерения"]).astype("int64").tolist(),
+            [Decimal(str(value)) for value in df["Обьем Договоров, руб."].tolist()],
+            pd.to_numeric(df["Количество Договоров, шт."]).astype("int64").tolist(),
+        )
+        constants = (self.bidding_date, current_datetime, current_datetime)
+        return [dict(zip(self.record_keys, (*row, *constants))) for row in zip(*columns)]
 
     def get_data(self) -> list[dict[str, Any]]:
         """Возвращает данные в виде списка словарей"""
@@ -87,3 +110,24 @@ class XLSExtractor:
             raise XLSExtractorError(f"Ошибка при обработке XLS-файла: {e}") from e
         except Exception as e:
             raise XLSExtractorError(f"Неизвестная ошибка при обработке файла: {e}") from e
+
+
+def parse_xls(source: str | bytes, bidding_date: date) -> list[dict[str, Any]]:
+    """
+    Извлекает данные торгов из xls-файла.
+
+    Функция уровня модуля, чтобы ее можно было выполнять в пуле процессов:
+    на вход получает путь к файлу на диске или, для небольших файлов, его
+    содержимое; возвращает простые (сериализуемые) записи.
+    """
+    if isinstance(source, bytes):
+        return XLSExtractor(io.BytesIO(source), bidding_date).get_data()
+    with open(source, "rb") as file:
+        return XLSExtractor(file, bidding_date).get_data()
+
+
+def timed_parse_xls(source: str | bytes, bidding_date: date) -> tuple[list[dict[str, Any]], float]:
+    """`parse_xls` и время разбора в секундах, замеренное в процессе пула (без ожидания в очереди пула)"""
+    start = time.perf_counter()
+    data = parse_xls(source, bidding_date)
+    return data, time.perf_counter() - start
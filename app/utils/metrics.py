@@ -0,0 +1,181 @@
+import math
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable
+
+LabelValues = tuple[tuple[str, str], ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, math.inf)
+
+
+def _labels(labels: dict[str, object]) -> LabelValues:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: LabelValues, extra: tuple[tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+class Metric(ABC):
+    """Базовая метрика с произвольными метками"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, registry: "Registry | None" = None):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    @abstractmethod
+    def samples(self) -> list[tuple[str, LabelValues, float]]:
+        """Значения метрики: (имя сэмпла, метки, значение)"""
+
+    def render(self) -> list[str]:
+        """Возвращает строки метрики в текстовом формате Prometheus"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        return lines
+
+
+class Counter(Metric):
+    """Монотонно возрастающий счетчик"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, registry: "Registry | None" = None):
+        super().__init__(name, documentation, registry)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_labels(labels), 0)
+
+    def total(self) -> float:
+        """Сумма по всем значениям меток"""
+        return sum(self._values.values())
+
+    def samples(self) -> list[tuple[str, LabelValues, float]]:
+        return [(f"{self.name}_total", labels, value) for labels, value in self._values.items()]
+
+
+class Gauge(Metric):
+    """Мгновенное значение; может вычисляться функцией в момент чтения"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, registry: "Registry | None" = None):
+        super().__init__(name, documentation, registry)
+        self._values: dict[LabelValues, float] = {}
+        self._functions: dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[_labels(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float], **labels) -> None:
+        self._functions[_labels(labels)] = function
+
+    def value(self, **labels) -> float:
+        key = _labels(labels)
+        if key in self._functions:
+            return self._functions[key]()
+        return self._values.get(key, 0)
+
+    def samples(self) -> list[tuple[str, LabelValues, float]]:
+        values = dict(self._values)
+        values.update((labels, function()) for labels, function in self._functions.items())
+        return [(self.name, labels, value) for labels, value in values.items()]
+
+
+class Histogram(Metric):
+    """Распределение значений по корзинам с суммой и количеством наблюдений"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        registry: "Registry | None" = None,
+    ):
+        super().__init__(name, documentation, registry)
+        self.buckets = tuple(sorted(buckets)) if math.inf in buckets else tuple(sorted(buckets)) + (math.inf,)
+        self._counts: dict[LabelValues, list[int]] = {}
+        self._sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[idx] += 1
+                    break
+            self._sums[key] = self._sums.get(key, 0) + value
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(_labels(labels), ()))
+
+    def sum(self, **labels) -> float:
+        return self._sums.get(_labels(labels), 0)
+
+    def total_count(self) -> int:
+        """Количество наблюдений по всем значениям меток"""
+        return sum(sum(counts) for counts in self._counts.values())
+
+    def total_sum(self) -> float:
+        """Сумма наблюдений по всем значениям меток"""
+        return sum(self._sums.values())
+
+    def samples(self) -> list[tuple[str, LabelValues, float]]:
+        samples = []
+        for labels, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else repr(bound)
+                samples.append((f"{self.name}_bucket", labels + (("le", le),), cumulative))
+            samples.append((f"{self.name}_sum", labels, self._sums[labels]))
+            samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+class Registry:
+    """Набор метрик процесса"""
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
@@ -0,0 +1,68 @@
+import base64
+import json
+from datetime import date
+from typing import Any
+
+MAX_ID = 2**31 - 1  # Наибольший id торгов: первичный ключ INTEGER
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Кодирует значения ключа последней записи страницы в непрозрачный курсор.
+
+    :param values: Значения ключа сортировки (даты сериализуются в ISO-формат).
+    :return: Строка base64url без выравнивания.
+    """
+    payload = json.dumps([value.isoformat() if isinstance(value, date) else value for value in values])
+    return base64.urlsafe_b64encode(payload.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    """
+    Декодирует курсор, полученный от `encode_cursor`.
+
+    :param cursor: Курсор из запроса.
+    :return: Список значений ключа (даты остаются строками ISO-формата).
+    :raises ValueError: Если курсор поврежден.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(payload)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Некорректный курсор") from e
+    if not isinstance(values, list):
+        raise ValueError("Некорректный курсор")
+    return values
+
+
+def _cursor_date(value: Any) -> date:
+    """Дата из значения курсора; ожидается строка ISO-формата"""
+    if not isinstance(value, str):
+        raise ValueError("Некорректный курсор")
+    return date.fromisoformat(value)
+
+
+def decode_date_cursor(cursor: str) -> date:
+    """Декодирует курсор вида (date) для списка торговых дней"""
+    values = decode_cursor(cursor)
+    if len(values) != 1:
+        raise ValueError("Некорректный курсор")
+    return _cursor_date(values[0])
+
+
+def decode_date_id_cursor(cursor: str) -> tuple[date, int]:
+    """Декодирует курсор вида (date, id) для списка торгов"""
+    values = decode_cursor(cursor)
+    if len(values) != 2 or not isinstance(values[1], int) or isinstance(values[1], bool):
+        raise ValueError("Некорректный курсор")
+    if not 0 <= values[1] <= MAX_ID:  # Иначе значение не передать в запрос: драйвер БД вернет ошибку
+        raise ValueError("Некорректный курсор")
+    return _cursor_date(values[0]), values[1]
+
+
+def decode_aggregate_cursor(cursor: str) -> tuple[date, str, str, str]:
+    """Декодирует курсор вида (period_start, oil_id, delivery_basis_id, delivery_type_id) для агрегатов"""
+    values = decode_cursor(cursor)
+    if len(values) != 4 or not all(isinstance(value, str) for value in values):
+        raise ValueError("Некорректный курсор")
+    return _cursor_date(values[0]), values[1], values[2], values[3]
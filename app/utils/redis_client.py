@@ -1,4 +1,7 @@
-from datetime import datetime, timedelta
+import json
+import random
+from datetime import date
+from typing import Iterable
 
 import redis.asyncio as aioredis
 from fastapi_cache import FastAPICache
@@ -6,6 +9,10 @@ from fastapi_cache.backends.redis import RedisBackend
 
 from configs.config import settings
 
+GENERATION_KEY = f"{settings.CACHE_PREFIX}:generation"  # Счетчик поколений данных, растет после каждой загрузки
+DATE_GENERATIONS_KEY = f"{settings.CACHE_PREFIX}:generation:dates"  # Хэш: дата торгов -> поколение ее последнего изменения
+EVENTS_CHANNEL = f"{settings.CACHE_PREFIX}:trading-updates"  # Канал pub/sub с событиями о загрузке торгов
+
 
 async def get_redis() -> aioredis.Redis:
     """
@@ -30,15 +37,35 @@ async def init_redis() -> aioredis.Redis:
     return redis_client
 
 
-async def get_expiries() -> int:
+def get_expiries() -> int:
     """
-    Рассчитывает время (в секундах) до ближайшего сброса кэша в 14:11.
+    Рассчитывает время жизни записи кэша со случайным разбросом.
+
+    Кэш сбрасывается по событию загрузки новых торгов, TTL нужен на случай
+    пропущенного события; разброс не дает всем записям истечь одновременно.
 
-    :return: Количество секунд до следующего сброса.
+    :return: Время жизни в секундах.
     """
-    now = datetime.now()
-    reset_time = now.replace(hour=14, minute=11, second=0, microsecond=0)
-    if now > reset_time:
-        reset_time += timedelta(days=1)
+    jitter = settings.CACHE_TTL * settings.CACHE_TTL_JITTER
+    return max(1, round(settings.CACHE_TTL + random.uniform(-jitter, jitter)))
 
-    return (reset_time - now).seconds
+
+async def publish_trading_update(redis: aioredis.Redis, dates: Iterable[date]) -> int:
+    """
+    Сообщает API о загрузке новых результатов торгов.
+
+    Увеличивает счетчик поколений, записывает новое поколение для каждой
+    затронутой даты (эти значения читают экземпляры API, запущенные после
+    события) и публикует событие в канал `EVENTS_CHANNEL`.
+
+    :param redis: Клиент Redis.
+    :param dates: Даты торгов, данные за которые были добавлены или обновлены.
+    :return: Новое поколение данных.
+    """
+    generation = await redis.incr(GENERATION_KEY)
+    days = sorted(day.isoformat() for day in dates)
+    if days:
+        await redis.hset(DATE_GENERATIONS_KEY, mapping=dict.fromkeys(days, generation))
+    event = {"generation": generation, "dates": days}
+    await redis.publish(EVENTS_CHANNEL, json.dumps(event))
+    return generation
@@ -0,0 +1,12 @@
+import os
+
+# Настройки приложения читаются при импорте; для модульных тестов БД и Redis не нужны
+for name, value in {
+    "POSTGRES_DB": "spimex",
+    "DB_PORT": "5432",
+    "POSTGRES_USER": "postgres",
+    "POSTGRES_PASSWORD": "postgres",
+    "REDIS_PORT": "6379",
+    "REDIS_DB": "0",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,231 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import date
+
+import pytest
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+
+from utils import cache
+from utils.cache import (
+    _normalize,
+    build_key,
+    cached,
+    CacheGeneration,
+    generation,
+    l1_cache,
+)
+
+
+class Session:
+    """Сессия-заглушка: отмечает, закрыта ли она"""
+
+    def __init__(self):
+        self.closed = False
+
+
+@pytest.fixture(autouse=True)
+def sessions(monkeypatch) -> list[Session]:
+    """Сессии, открытые кэшем для загрузок"""
+    opened = []
+
+    @asynccontextmanager
+    async def read_session():
+        session = Session()
+        opened.append(session)
+        try:
+            yield session
+        finally:
+            session.closed = True
+
+    monkeypatch.setattr(cache, "read_session", read_session)
+    return opened
+
+
+@pytest.fixture(autouse=True)
+def cache_backend():
+    Service.calls = []
+    InMemoryBackend._store.clear()  # Хранилище общее для всех экземпляров бэкенда
+    FastAPICache.reset()
+    FastAPICache.init(InMemoryBackend(), prefix="test")
+    l1_cache.clear()
+    generation.load(0, {})
+    yield
+    l1_cache.clear()
+    generation.load(0, {})
+    FastAPICache.reset()
+
+
+class Service:
+    """Сервис с кэшируемыми методами; у каждого запроса API свой экземпляр со своей сессией"""
+
+    calls: list[Session] = []  # Сессии, на которых выполнялись методы
+
+    def __init__(self, session: Session | None = None):
+        self.session = session if session is not None else Session()
+
+    @cached("test:dates")
+    async def dates(self, offset: int = 0, limit: int = 10, cursor: str | None = None) -> list[int]:
+        Service.calls.append(self.session)
+        return list(range(offset, offset + limit))
+
+    @cached("test:filter")
+    async def filter(self, **filters) -> list[str]:
+        Service.calls.append(self.session)
+        return sorted(f"{name}={value}" for name, value in filters.items())
+
+    @cached("test:slow")
+    async def slow(self, delay: float) -> str:
+        Service.calls.append(self.session)
+        await asyncio.sleep(delay)
+        assert not self.session.closed
+        return "done"
+
+
+def test_normalize_flattens_kwargs_and_drops_none():
+    arguments = {"filters": {"oil_id": "A592", "delivery_basis_id": None, "start_date": date(2024, 5, 1)}}
+
+    assert _normalize(arguments) == {"oil_id": "A592", "start_date": "2024-05-01"}
+
+
+def test_normalize_keeps_falsy_values():
+    assert _normalize({"offset": 0, "cursor": None, "name": ""}) == {"offset": 0, "name": ""}
+
+
+def test_build_key_ignores_argument_order_and_none():
+    first = build_key("trading:filter", {"filters": {"oil_id": "A592", "limit": 10, "cursor": None}})
+    second = build_key("trading:filter", {"filters": {"limit": 10, "oil_id": "A592"}})
+
+    assert first == second
+    assert first.startswith("test:trading:filter:")
+
+
+def test_build_key_differs_by_namespace_and_value():
+    key = build_key("trading:filter", {"limit": 10})
+
+    assert key != build_key("trading:aggregate", {"limit": 10})
+    assert key != build_key("trading:filter", {"limit": 11})
+    assert build_key("trading:filter", {"day": date(2024, 5, 1)}) == build_key("trading:filter", {"day": "2024-05-01"})
+
+
+async def test_defaults_and_positional_arguments_share_entry():
+    service = Service()
+
+    assert await service.dates() == list(range(10))
+    await Service().dates(0, 10)
+    await Service().dates(limit=10, cursor=None)
+
+    assert len(Service.calls) == 1
+
+
+async def test_service_instance_is_not_part_of_key():
+    first, second = Service(), Service()
+
+    expected = await first.filter(oil_id="A592", start_date=date(2024, 5, 1), delivery_basis_id=None)
+    result = await second.filter(start_date=date(2024, 5, 1), oil_id="A592")
+
+    assert result == expected
+    assert len(Service.calls) == 1
+
+
+async def test_second_tier_is_shared_across_processes():
+    service = Service()
+    await service.filter(oil_id="A592")
+    l1_cache.clear()  # Как в другом процессе API: первый уровень пуст, запись есть только во втором
+
+    await service.filter(oil_id="A592")
+
+    assert len(Service.calls) == 1
+
+
+async def test_disabled_cache_calls_method():
+    FastAPICache.reset()
+    FastAPICache.init(InMemoryBackend(), prefix="test", enable=False)
+    service = Service()
+
+    await service.dates()
+    await service.dates()
+
+    assert Service.calls == [service.session, service.session]
+
+
+async def test_load_runs_on_its_own_session(sessions):
+    service = Service()
+
+    await service.dates()
+
+    assert Service.calls == sessions
+    assert service.session not in Service.calls
+    assert sessions[0].closed
+
+
+async def test_coalesced_load_survives_cancelled_first_request(sessions):
+    first = asyncio.create_task(Service().slow(0.05))
+    await asyncio.sleep(0)  # Первый запрос начал загрузку
+    second = asyncio.create_task(Service().slow(0.05))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "done"
+    assert first.cancelled()
+    assert Service.calls == sessions
+    assert len(sessions) == 1 and sessions[0].closed
+
+
+@pytest.fixture
+def generations() -> CacheGeneration:
+    """Поколения после загрузок: 1 - за 1-2 мая, 2 - за 3 мая, 3 - повторно за 1 мая"""
+    state = CacheGeneration()
+    state.load(2, {"2024-05-01": "1", "2024-05-02": "1", "2024-05-03": "2"})
+    state.update(3, ["2024-05-01"])
+    return state
+
+
+@pytest.mark.parametrize(
+    ("start", "end", "expected"),
+    [
+        (None, None, 3),
+        ("2024-05-02", None, 2),
+        ("2024-05-02", "2024-05-02", 1),
+        (None, "2024-05-01", 3),
+        ("2024-04-01", "2024-04-30", 0),
+        ("2024-05-04", None, 0),
+        ("2024-04-30", "2024-05-02", 3),
+    ],
+)
+def test_generation_for_range(generations, start, end, expected):
+    assert generations.for_range(start, end) == expected
+
+
+def test_generation_middle_range():
+    state = CacheGeneration()
+    state.update(1, ["2024-05-01", "2024-05-05"])
+    state.update(2, ["2024-05-03"])
+
+    assert state.for_range("2024-05-02", "2024-05-04") == 2
+    assert state.for_range("2024-05-04", "2024-05-04") == 0
+    assert state.value == 2
+
+
+def test_load_for_new_dates_changes_only_keys_that_cover_them():
+    period = {"filters": {"oil_id": "A592", "start_date": date(2024, 4, 1), "end_date": date(2024, 4, 30)}}
+    latest = {"filters": {"oil_id": "A592", "limit": 100}}
+    open_period = {"filters": {"start_date": date(2024, 4, 1)}}
+    date_range = ("start_date", "end_date")
+    before = [build_key("trading:filter", arguments, date_range) for arguments in (period, latest, open_period)]
+
+    generation.update(1, ["2024-05-17"])
+
+    after = [build_key("trading:filter", arguments, date_range) for arguments in (period, latest, open_period)]
+    assert after[0] == before[0]
+    assert after[1] != before[1]
+    assert after[2] != before[2]
+
+
+def test_correction_of_past_date_changes_keys_of_periods_with_it():
+    period = {"start_date": date(2024, 4, 1), "end_date": date(2024, 4, 30)}
+    before = build_key("trading:aggregate", period, ("start_date", "end_date"))
+
+    generation.update(1, ["2024-04-15"])
+
+    assert build_key("trading:aggregate", period, ("start_date", "end_date")) != before
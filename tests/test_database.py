@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from database import database
+from database.database import read_session, ReadRouting, replica_fallbacks
+
+
+def sqlite_engine(path) -> AsyncEngine:
+    """Движок с пулом на одно соединение и коротким ожиданием свободного"""
+    return create_async_engine(f"sqlite+aiosqlite:///{path}", pool_size=1, max_overflow=0, pool_timeout=0.1)
+
+
+@pytest.fixture
+async def engines(tmp_path):
+    primary, replica = sqlite_engine(tmp_path / "primary.db"), sqlite_engine(tmp_path / "replica.db")
+    yield primary, replica
+    await primary.dispose()
+    await replica.dispose()
+
+
+@pytest.fixture
+def routing(monkeypatch, engines) -> ReadRouting:
+    routing = ReadRouting(*engines, retry_after=60)
+    monkeypatch.setattr(database, "read_routing", routing)
+    return routing
+
+
+async def test_reads_go_to_replica(routing, engines):
+    _, replica = engines
+
+    async with read_session() as session:
+        assert await session.scalar(select(1)) == 1
+        assert replica.pool.checkedout() == 1
+
+
+async def test_unused_session_takes_no_connection(routing, engines):
+    _, replica = engines
+
+    async with read_session():
+        assert replica.pool.checkedout() == 0
+
+
+async def test_load_runs_while_request_session_is_open(routing):
+    # Как при промахе кэша: загрузка открывает свою сессию, пока открыта сессия запроса
+    async with read_session():
+        async with read_session() as load_session:
+            assert await load_session.scalar(select(1)) == 1
+
+
+async def test_unreachable_replica_falls_back_to_primary(monkeypatch, routing, tmp_path):
+    unreachable = sqlite_engine(tmp_path / "missing" / "replica.db")  # Файл не открыть: ошибка подключения
+    monkeypatch.setattr(routing, "replica", unreachable)
+    fallbacks = replica_fallbacks.value()
+
+    async with read_session() as session:
+        assert await session.scalar(select(1)) == 1
+
+    assert routing.engine() is routing.primary
+    assert replica_fallbacks.value() == fallbacks + 1
+    await unreachable.dispose()
+
+
+async def test_full_pool_is_not_a_replica_outage(routing, engines):
+    _, replica = engines
+    fallbacks = replica_fallbacks.value()
+
+    async with replica.connect():  # Единственное соединение пула занято
+        with pytest.raises(PoolTimeoutError):
+            async with read_session() as session:
+                await session.scalar(select(1))
+
+    assert routing.engine() is routing.replica
+    assert replica_fallbacks.value() == fallbacks
@@ -0,0 +1,71 @@
+from datetime import date
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+from utils.file_utils import XLSExtractor
+
+COLUMNS = [
+    "Код Инструмента",
+    "Наименование Инструмента",
+    "Базис поставки",
+    "Объем Договоров в единицах измерения",
+    "Обьем Договоров, руб.",
+    "Количество Договоров, шт.",
+]
+
+
+@pytest.fixture
+def extractor() -> XLSExtractor:
+    """Экстрактор без файла: проверяются только шаги обработки таблицы"""
+    extractor = XLSExtractor.__new__(XLSExtractor)
+    extractor.bidding_date = date(2024, 5, 17)
+    return extractor
+
+
+@pytest.fixture
+def table() -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            ["A100ANK060F", "Бензин (АИ-100) ст. Ангарск", "ст. Ангарск", "60", "5580000", "1"],
+            ["A592ACH005A", "Бензин (АИ-92) Ачинский НПЗ", "Ачинский НПЗ", "-", "-", "-"],
+            ["A95RNFX065F", "Бензин (АИ-95) НБ Новосибирск", "НБ Новосибирск", 130.0, 8190000.5, 2.0],
+            ["DT0KNOV060F", "ДТ ЕВРО К5 ст. Новосибирск", "ст. Новосибирск", "60", "4200000", "0"],
+            ["", "Итого:", "", "190", "13770000.5", "3"],
+            ["", "Итого по секции:", "", "190", "13770000.5", "3"],
+        ],
+        columns=COLUMNS,
+    )
+
+
+def test_filter_valid_rows_drops_empty_trades_and_totals(extractor, table):
+    filtered = extractor._filter_valid_rows(table)
+
+    assert filtered["Код Инструмента"].tolist() == ["A100ANK060F", "A95RNFX065F"]
+
+
+def test_filter_valid_rows_without_count_column(extractor, table):
+    with pytest.raises(StopIteration):
+        extractor._filter_valid_rows(table.drop(columns="Количество Договоров, шт."))
+
+
+def test_to_dict_builds_records(extractor, table):
+    records = extractor._to_dict(extractor._filter_valid_rows(table))
+
+    assert len(records) == 2
+    first, second = records
+    assert list(first) == list(XLSExtractor.record_keys)
+    assert first["exchange_product_id"] == "A100ANK060F"
+    assert first["exchange_product_name"] == "Бензин (АИ-100) ст. Ангарск"
+    assert (first["oil_id"], first["delivery_basis_id"], first["delivery_type_id"]) == ("A100", "ANK", "F")
+    assert first["delivery_basis_name"] == "ст. Ангарск"
+    assert (first["volume"], first["total"], first["count"]) == (60, Decimal("5580000"), 1)
+    assert first["date"] == date(2024, 5, 17)
+    assert first["created_on"] == first["updated_on"]
+    assert (second["volume"], second["total"], second["count"]) == (130, Decimal("8190000.5"), 2)
+    assert all(type(record[key]) is int for record in records for key in ("volume", "count"))
+
+
+def test_to_dict_empty_table(extractor, table):
+    assert extractor._to_dict(table.iloc[:0]) == []
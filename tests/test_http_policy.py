@@ -0,0 +1,123 @@
+import asyncio
+from types import SimpleNamespace
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from parsers import http_policy
+from parsers.http_policy import HttpPolicy
+
+
+@pytest.fixture
+def delays(monkeypatch) -> list[float]:
+    """Задержки перед повторами; сами паузы не выполняются"""
+    recorded = []
+
+    async def fake_sleep(delay: float) -> None:
+        recorded.append(delay)
+
+    # Подменяется только asyncio модуля политики, цикл событий и сервер работают как обычно
+    monkeypatch.setattr(http_policy, "asyncio", SimpleNamespace(**{**vars(asyncio), "sleep": fake_sleep}))
+    return recorded
+
+
+def reply(status: int = 200, text: str = "ok", headers: dict[str, str] | None = None) -> dict:
+    return {"status": status, "text": text, "headers": headers}
+
+
+async def serve(responses: list[dict]) -> TestServer:
+    """Сервер, отдающий ответы по порядку; последний повторяется"""
+    calls = iter(responses)
+    last = responses[-1]
+
+    async def handler(request: web.Request) -> web.Response:
+        return web.Response(**next(calls, last))
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+async def fetch(policy: HttpPolicy, responses: list[dict]) -> tuple[int, str]:
+    async def read(response: aiohttp.ClientResponse) -> tuple[int, str]:
+        return response.status, await response.text()
+
+    server = await serve(responses)
+    try:
+        async with aiohttp.ClientSession() as session:
+            return await policy.get(session, str(server.make_url("/")), read)
+    finally:
+        await server.close()
+
+
+@pytest.mark.parametrize(("attempt", "expected"), [(0, 0.5), (1, 1.0), (3, 4.0), (6, 30.0), (20, 30.0)])
+def test_backoff_is_capped_exponent(monkeypatch, attempt, expected):
+    monkeypatch.setattr(http_policy.random, "uniform", lambda low, high: (low, high))
+
+    assert HttpPolicy()._backoff(attempt) == (0, expected)
+
+
+def test_backoff_has_full_jitter():
+    policy = HttpPolicy(backoff_base=1.0)
+
+    samples = [policy._backoff(2) for _ in range(200)]
+
+    assert all(0 <= delay <= 4.0 for delay in samples)
+    assert len(set(samples)) > 1
+
+
+async def test_retry_after_is_honoured(delays):
+    policy = HttpPolicy(rate=None)
+
+    result = await fetch(policy, [reply(503, headers={"Retry-After": "2"}), reply()])
+
+    assert result == (200, "ok")
+    assert delays == [2.0]
+
+
+async def test_retry_after_is_capped(delays):
+    policy = HttpPolicy(rate=None, backoff_max=5.0)
+
+    await fetch(policy, [reply(429, headers={"Retry-After": "120"}), reply()])
+
+    assert delays == [5.0]
+
+
+@pytest.mark.parametrize("headers", [{}, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}])
+async def test_backoff_without_numeric_retry_after(monkeypatch, delays, headers):
+    monkeypatch.setattr(http_policy.random, "uniform", lambda low, high: high)
+    policy = HttpPolicy(rate=None, backoff_base=0.5)
+
+    await fetch(policy, [reply(502, headers=headers)] * 3 + [reply()])
+
+    assert delays == [0.5, 1.0, 2.0]
+
+
+async def test_last_retryable_response_is_handed_to_handler(delays):
+    policy = HttpPolicy(rate=None, max_retries=2)
+
+    result = await fetch(policy, [reply(503, "busy")])
+
+    assert result == (503, "busy")
+    assert len(delays) == 2
+
+
+async def test_client_error_is_not_retried(delays):
+    policy = HttpPolicy(rate=None)
+
+    async def fail(response: aiohttp.ClientResponse) -> None:
+        response.raise_for_status()
+
+    server = await serve([reply(404)])
+    try:
+        async with aiohttp.ClientSession() as session:
+            with pytest.raises(aiohttp.ClientResponseError):
+                await policy.get(session, str(server.make_url("/")), fail)
+    finally:
+        await server.close()
+
+    assert delays == []
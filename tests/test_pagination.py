@@ -0,0 +1,116 @@
+import base64
+import json
+from datetime import date
+
+import httpx
+import pytest
+from main import app
+from pydantic import ValidationError
+
+from schemas.params import AggregateParams, LastParams, LimitOffset, MAX_LIMIT
+from utils.pagination import (
+    decode_aggregate_cursor,
+    decode_cursor,
+    decode_date_cursor,
+    decode_date_id_cursor,
+    encode_cursor,
+)
+
+
+def raw_cursor(payload: str) -> str:
+    """Курсор с произвольным содержимым, в обход encode_cursor"""
+    return base64.urlsafe_b64encode(payload.encode()).rstrip(b"=").decode()
+
+
+def test_encode_cursor_is_url_safe_without_padding():
+    cursor = encode_cursor(date(2024, 5, 17), 12345)
+
+    assert "=" not in cursor
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+    assert decode_cursor(cursor) == ["2024-05-17", 12345]
+
+
+def test_date_cursor_round_trip():
+    assert decode_date_cursor(encode_cursor(date(2024, 5, 17))) == date(2024, 5, 17)
+
+
+def test_date_id_cursor_round_trip():
+    assert decode_date_id_cursor(encode_cursor(date(2024, 5, 17), 42)) == (date(2024, 5, 17), 42)
+
+
+def test_aggregate_cursor_round_trip():
+    cursor = encode_cursor(date(2024, 5, 1), "A592", "ACH", "A")
+
+    assert decode_aggregate_cursor(cursor) == (date(2024, 5, 1), "A592", "ACH", "A")
+
+
+@pytest.mark.parametrize("cursor", ["", "!!!", "bm90IGpzb24", raw_cursor('{"date": "2024-05-17"}'), raw_cursor("1")])
+def test_decode_cursor_rejects_garbage(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize(
+    "payload", ["[]", "[1]", "[null]", '["2024-05-17", 1]', '["17.05.2024"]', '[["2024-05-17"]]']
+)
+def test_decode_date_cursor_rejects(payload):
+    with pytest.raises(ValueError):
+        decode_date_cursor(raw_cursor(payload))
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        "[1, 2]",
+        '["2024-05-17"]',
+        '["2024-05-17", "2"]',
+        '["2024-05-17", true]',
+        '["2024-13-01", 1]',
+        '["2024-05-17", -1]',
+        f'["2024-05-17", {2**31}]',
+    ],
+)
+def test_decode_date_id_cursor_rejects(payload):
+    with pytest.raises(ValueError):
+        decode_date_id_cursor(raw_cursor(payload))
+
+
+@pytest.mark.parametrize(
+    "payload", ['[1, "A592", "ACH", "A"]', '["2024-05-01", "A592", "ACH"]', '["2024-05-01", "A592", "ACH", 1]']
+)
+def test_decode_aggregate_cursor_rejects(payload):
+    with pytest.raises(ValueError):
+        decode_aggregate_cursor(raw_cursor(payload))
+
+
+@pytest.mark.parametrize(
+    ("model", "payload"), [(LimitOffset, "[1]"), (LastParams, "[1, 2]"), (AggregateParams, '[1, "A592", "ACH", "A"]')]
+)
+def test_malformed_cursor_is_validation_error(model, payload):
+    with pytest.raises(ValidationError):
+        model(cursor=raw_cursor(payload))
+
+
+@pytest.mark.parametrize(
+    ("path", "payload"),
+    [
+        ("/trading/last_trading_dates", "[1]"),
+        ("/trading/trading_results", "[1, 2]"),
+        ("/trading/dynamics", "[1, 2]"),
+        ("/trading/trading_results", f'["2024-05-17", {2**40}]'),
+        ("/trading/dynamics", f'["2024-05-17", {2**40}]'),
+    ],
+)
+async def test_malformed_cursor_is_422(path, payload):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as client:
+        response = await client.get(path, params={"cursor": raw_cursor(payload)})
+
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("path", ["/trading/trading_results", "/trading/dynamics", "/trading/dynamics/aggregates"])
+async def test_limit_above_maximum_is_422(path):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as client:
+        response = await client.get(path, params={"limit": MAX_LIMIT + 1})
+
+    assert response.status_code == 422
@@ -0,0 +1,68 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pytest
+
+from parsers import pipeline
+from parsers.cache import CacheEntry, FileCache
+from parsers.pipeline import IngestionPipeline, PipelineConfig
+from parsers.scraper import _rollover, spool_path
+
+BIDDING_DATE = date(2024, 5, 17)
+
+
+@pytest.fixture
+def sources(monkeypatch) -> list[str | bytes]:
+    """Что получил разбор: путь к файлу или содержимое"""
+    received = []
+
+    def fake_parse(source: str | bytes, bidding_date: date) -> tuple[list[dict], float]:
+        # Как процесс пула: файл открывается по пути заново
+        received.append(source)
+        if isinstance(source, str):
+            with open(source, "rb") as file:
+                source = file.read()
+        return [{"content": source}], 0.0
+
+    monkeypatch.setattr(pipeline, "timed_parse_xls", fake_parse)
+    return received
+
+
+@pytest.fixture
+def parser(sources) -> IngestionPipeline:
+    config = PipelineConfig(base_url="", page_url="", first_page=1, last_page=1, min_year=2024, current_year=2024)
+    parser = IngestionPipeline(config, loader=None)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        parser.executor = executor
+        yield parser
+
+
+def test_spool_path_only_for_spooled_files(tmp_path):
+    entry = FileCache(tmp_path, max_bytes=100).store(CacheEntry("https://spimex.com/a.xls"), io.BytesIO(b"xls"))
+
+    with _rollover(io.BytesIO(b"xls")) as spooled, entry.open() as cached:
+        assert spool_path(spooled) == spooled.name
+        assert spool_path(cached) is None
+    assert spool_path(io.BytesIO(b"xls")) is None
+
+
+async def test_parse_passes_spooled_file_by_path(parser, sources):
+    file = _rollover(io.BytesIO(b"spooled"))
+    file.seek(0)
+
+    assert await parser._parse((file, BIDDING_DATE)) == [([{"content": b"spooled"}], BIDDING_DATE)]
+    assert sources == [file.name]
+    assert file.closed
+
+
+async def test_parse_survives_eviction_of_cached_file(parser, sources, tmp_path):
+    cache = FileCache(tmp_path, max_bytes=10)
+    entry = cache.store(CacheEntry("https://spimex.com/a.xls"), io.BytesIO(b"cached"))
+    file = entry.open()  # Бюллетень из кэша ждет разбора в очереди
+    cache.store(CacheEntry("https://spimex.com/b.xls"), io.BytesIO(b"newer"))  # Другая загрузка вытесняет запись
+
+    assert not entry.path.exists()
+    assert await parser._parse((file, BIDDING_DATE)) == [([{"content": b"cached"}], BIDDING_DATE)]
+    assert sources == [b"cached"]
+    assert file.closed
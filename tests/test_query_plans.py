@@ -0,0 +1,23 @@
+import os
+
+import pytest
+from benchmarks.explain_indexes import check_plans
+
+from database.database import engine
+
+# Проверка планов на копии таблицы с миллионами строк: минуты работы и PostgreSQL с примененными миграциями
+EXPLAIN_TEST_ROWS = os.environ.get("EXPLAIN_TEST_ROWS")
+
+pytestmark = pytest.mark.skipif(
+    not EXPLAIN_TEST_ROWS, reason="нужен PostgreSQL; задайте EXPLAIN_TEST_ROWS, например 3000000"
+)
+
+
+async def test_filters_use_composite_indexes():
+    try:
+        results = await check_plans(int(EXPLAIN_TEST_ROWS))
+    finally:
+        await engine.dispose()
+
+    failed = [f"{name}: {description}" for name, ok, description in results if not ok]
+    assert not failed, "\n".join(failed)
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from parsers.scraper import _measured, fetch_seconds
+
+
+def observed(result: str) -> int:
+    return fetch_seconds.count(kind="test", result=result)
+
+
+@pytest.mark.parametrize(
+    ("value", "result"),
+    [("page", "ok"), (None, "error")],
+)
+async def test_measured_labels_result(value, result):
+    @_measured("test")
+    async def fetch() -> str | None:
+        return value
+
+    before = observed(result)
+
+    assert await fetch() == value
+    assert observed(result) == before + 1
+
+
+async def test_measured_counts_exception_as_error():
+    @_measured("test")
+    async def fetch() -> str | None:
+        raise RuntimeError("сеть недоступна")
+
+    before = observed("error")
+
+    with pytest.raises(RuntimeError):
+        await fetch()
+    assert observed("error") == before + 1
+
+
+async def test_measured_counts_cancellation_as_error():
+    @_measured("test")
+    async def fetch() -> str | None:
+        await asyncio.sleep(10)
+        return "page"
+
+    before = observed("error")
+    task = asyncio.create_task(fetch())
+    await asyncio.sleep(0)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert observed("error") == before + 1